@@ -0,0 +1,136 @@
+import asyncio
+from pathlib import Path
+from starlette.applications import Starlette
+from starlette.requests import ClientDisconnect, Request
+from starlette.responses import FileResponse, JSONResponse, Response
+from starlette.routing import Route
+from app import uploads
+from app.config import DATA_DIR
+from app.media import DERIVATIVES_DIRNAME, MEDIA_ROUTE, media_type
+
+# Derivative names embed a fingerprint of their source, so their bytes never change.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Originals keep their upload name and can be replaced, so always revalidate.
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+async def serve_media(request: Request) -> Response:
+    """Serves an entry file with ETag revalidation and byte-range support."""
+    relative = Path(request.path_params["path"])
+    # Only files inside a class/date entry; never the index or hidden caches.
+    if len(relative.parts) < 3 or any(part.startswith(".") for part in relative.parts):
+        return Response(status_code=404)
+    root = DATA_DIR.resolve()
+    path = (root / relative).resolve()
+    if not path.is_relative_to(root) or not path.is_file():
+        return Response(status_code=404)
+    cache_control = (
+        IMMUTABLE_CACHE_CONTROL
+        if DERIVATIVES_DIRNAME in relative.parts
+        else REVALIDATE_CACHE_CONTROL
+    )
+    response = FileResponse(
+        path,
+        stat_result=path.stat(),
+        headers={"Cache-Control": cache_control},
+        media_type=media_type(path),
+    )
+    etag = response.headers["etag"]
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(
+            status_code=304, headers={"ETag": etag, "Cache-Control": cache_control}
+        )
+    return response
+
+
+async def create_upload(request: Request) -> Response:
+    """Starts a resumable upload from a {"filename", "size"} JSON body."""
+    try:
+        body = await request.json()
+        status = uploads.create_upload(str(body["filename"]), int(body["size"]))
+    except (ValueError, KeyError, TypeError):
+        return JSONResponse({"error": "Expected filename and size"}, status_code=400)
+    except uploads.UploadError as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
+    return JSONResponse(
+        status,
+        status_code=201,
+        headers={"Location": f"{uploads.UPLOAD_ROUTE}/{status['id']}"},
+    )
+
+
+async def upload_status(request: Request) -> Response:
+    """Reports an upload's received chunks so a client can resume it."""
+    try:
+        status = uploads.get_status(request.path_params["upload_id"])
+    except uploads.UploadError as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
+    return JSONResponse(status, headers={"Cache-Control": "no-store"})
+
+
+async def upload_chunk(request: Request) -> Response:
+    """Accepts one chunk, streamed straight to its place in the file."""
+    try:
+        status = await uploads.receive_chunk(
+            request.path_params["upload_id"],
+            request.path_params["index"],
+            request.stream(),
+            request.headers.get("upload-checksum"),
+        )
+    except uploads.UploadError as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
+    except ClientDisconnect:
+        return Response(status_code=400)
+    return JSONResponse(
+        {"received_bytes": status["received_bytes"], "complete": status["complete"]}
+    )
+
+
+async def append_live_audio(request: Request) -> Response:
+    """Appends one MediaRecorder timeslice to a recording in progress."""
+    try:
+        offset = int(request.query_params["offset"])
+        data = await request.body()
+        size = await asyncio.to_thread(
+            uploads.append_live_audio, request.path_params["recording_id"], offset, data
+        )
+    except (KeyError, ValueError):
+        return JSONResponse({"error": "Expected an offset"}, status_code=400)
+    except uploads.UploadError as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
+    except ClientDisconnect:
+        return Response(status_code=400)
+    return JSONResponse({"size": size})
+
+
+async def cancel_upload(request: Request) -> Response:
+    uploads.discard(request.path_params["upload_id"])
+    return Response(status_code=204)
+
+
+api = Starlette(
+    routes=[
+        Route(f"{MEDIA_ROUTE}/{{path:path}}", serve_media, methods=["GET", "HEAD"]),
+        Route(uploads.UPLOAD_ROUTE, create_upload, methods=["POST"]),
+        Route(
+            f"{uploads.UPLOAD_ROUTE}/{{upload_id}}",
+            upload_status,
+            methods=["GET", "HEAD"],
+        ),
+        Route(
+            f"{uploads.UPLOAD_ROUTE}/{{upload_id}}",
+            cancel_upload,
+            methods=["DELETE"],
+        ),
+        Route(
+            f"{uploads.UPLOAD_ROUTE}/{{upload_id}}/{{index:int}}",
+            upload_chunk,
+            methods=["PUT"],
+        ),
+        Route(
+            f"{uploads.LIVE_AUDIO_ROUTE}/{{recording_id}}",
+            append_live_audio,
+            methods=["PUT"],
+        ),
+    ]
+)
@@ -1,9 +1,13 @@
 import reflex as rx
-from app.components.recorder import recorder_page
 from app.components.gallery import gallery_page
+from app.components.search import search_page
 from app.states.gallery_state import GalleryState
+from app import metrics
+from app.api import api
+from app.config import GALLERY_ONLY
 
 app = rx.App(
+    api_transformer=api,
     theme=rx.theme(appearance="light"),
     head_components=[
         rx.el.link(rel="preconnect", href="https://fonts.googleapis.com"),
@@ -14,5 +18,18 @@ app = rx.App(
         ),
     ],
 )
-app.add_page(recorder_page, route="/")
-app.add_page(gallery_page, route="/gallery", on_load=GalleryState.on_load)
\ No newline at end of file
+if metrics.ENABLED:
+    api.add_route(metrics.METRICS_ROUTE, metrics.serve_metrics, methods=["GET"])
+    app.add_middleware(metrics.EventMetricsMiddleware())
+if GALLERY_ONLY:
+    # Browsing only: the recorder, and with it every transcription dependency,
+    # is never imported.
+    app.add_page(gallery_page, route="/", on_load=GalleryState.on_load)
+else:
+    from app.components.recorder import recorder_page
+    from app import transcription_jobs
+
+    app.register_lifespan_task(transcription_jobs.warm_up)
+    app.add_page(recorder_page, route="/")
+app.add_page(gallery_page, route="/gallery", on_load=GalleryState.on_load)
+app.add_page(search_page, route="/search")
@@ -0,0 +1,81 @@
+import asyncio
+import functools
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+from app import index, storage, utils
+from app.classes import TranscriptSegment
+from app.config import STORAGE_READ_CONCURRENCY, STORAGE_WRITE_CONCURRENCY
+
+T = TypeVar("T")
+
+# Event handlers share one event loop, so any blocking stat, read or write in a
+# handler stalls every connected client. These run the blocking calls on worker
+# threads instead. Reads and writes get separate limits so a few large saves can
+# never take all the threads that gallery reads need.
+_read_slots = asyncio.Semaphore(STORAGE_READ_CONCURRENCY)
+_write_slots = asyncio.Semaphore(STORAGE_WRITE_CONCURRENCY)
+
+
+async def read(func: Callable[..., T], *args, **kwargs) -> T:
+    """Runs a blocking read off the event loop."""
+    async with _read_slots:
+        return await asyncio.to_thread(functools.partial(func, *args, **kwargs))
+
+
+async def write(func: Callable[..., T], *args, **kwargs) -> T:
+    """Runs a blocking write off the event loop."""
+    async with _write_slots:
+        return await asyncio.to_thread(functools.partial(func, *args, **kwargs))
+
+
+async def save_entry(
+    class_slug: str,
+    date_str: str,
+    images: list[Path],
+    videos: list[Path],
+    audio_file: Optional[Path],
+    typed_text: str,
+    transcript: str,
+    segments: Optional[list[TranscriptSegment]] = None,
+    digests: Optional[dict[Path, str]] = None,
+) -> bool:
+    return await write(
+        storage.save_entry,
+        class_slug,
+        date_str,
+        images,
+        videos,
+        audio_file,
+        typed_text,
+        transcript,
+        segments,
+        digests,
+    )
+
+
+async def load_segments(
+    class_slug: str, date_str: str, entry_id: str
+) -> list[TranscriptSegment]:
+    return await read(storage.load_segments, class_slug, date_str, entry_id)
+
+
+async def count_dates_for_class(class_slug: str) -> int:
+    return await read(utils.count_dates_for_class, class_slug)
+
+
+async def get_date_position(class_slug: str, date_str: str) -> int:
+    return await read(utils.get_date_position, class_slug, date_str)
+
+
+async def get_date_window(class_slug: str, offset: int, limit: int) -> list[str]:
+    return await read(utils.get_date_window, class_slug, offset, limit)
+
+
+async def get_entry_summaries(
+    class_slug: str, offset: int, limit: int
+) -> list[index.EntrySummary]:
+    return await read(utils.get_entry_summaries, class_slug, offset, limit)
+
+
+async def search_entries(query: str, limit: int = 20) -> list[index.SearchResult]:
+    return await read(utils.search_entries, query, limit)
@@ -0,0 +1,248 @@
+import contextlib
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import TypedDict
+from app.config import DATA_DIR
+
+# Media is stored once under its SHA-256 and hard-linked into each entry that uses
+# it. Entries keep ordinary files (so serving, derivatives and the index work as
+# before), and a blob's link count doubles as its reference count: a blob with no
+# links besides its own is garbage.
+BLOBS_DIR = DATA_DIR / ".blobs"
+MANIFEST_FILENAME = "manifest.json"
+LOCK_FILENAME = ".lock"
+MEDIA_DIRNAMES = ("images", "videos")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@contextlib.contextmanager
+def _locked():
+    """Holds the store's lock, shared by every thread and process using DATA_DIR.
+
+    Adding a file links it into its entry under the lock, and garbage collection
+    only deletes under it, so `python -m app.blobs gc` running alongside the app
+    can't take a blob between the two.
+    """
+    BLOBS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(BLOBS_DIR / LOCK_FILENAME, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+class BlobStats(TypedDict):
+    blobs: int
+    stored_bytes: int
+    referenced_bytes: int
+    unreferenced: int
+
+
+def hash_file(path: Path) -> str:
+    """Returns a file's SHA-256, reading it in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_path(digest: str, suffix: str = "") -> Path:
+    return BLOBS_DIR / digest[:2] / f"{digest}{suffix.lower()}"
+
+
+def refcount(blob: Path) -> int:
+    """Returns how many entry files share a blob."""
+    return blob.stat().st_nlink - 1
+
+
+def link_or_copy(source: Path, dest: Path) -> None:
+    """Hard-links `source` to `dest`, copying where hard links aren't possible."""
+    try:
+        os.link(source, dest)
+    except OSError as e:
+        # Filesystems without hard links still work, just without deduplication.
+        logging.warning(f"Could not hard-link {source} to {dest}, copying: {e}")
+        shutil.copy2(source, dest)
+
+
+def _put(source: Path, digest: str) -> Path:
+    """Adds a file's content to the store unless it is already there."""
+    blob = blob_path(digest, source.suffix)
+    if not blob.exists():
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        # A copy is made under a temporary name, so a failed one never leaves a
+        # truncated file under the digest.
+        tmp_path = blob.with_name(f".{blob.name}.tmp")
+        tmp_path.unlink(missing_ok=True)
+        link_or_copy(source, tmp_path)
+        tmp_path.replace(blob)
+    return blob
+
+
+def link_into(blob: Path, digest: str, dest_dir: Path, name: str) -> Path:
+    """Links a blob into an entry directory under `name`, keeping existing files.
+
+    Saving the same content under the same name again is a no-op. A different file
+    that happens to share the name gets the digest appended instead of replacing it.
+    """
+    dest_dir.mkdir(exist_ok=True)
+    dest = dest_dir / name
+    if dest.exists() and not os.path.samefile(dest, blob):
+        dest = dest_dir / f"{dest.stem}-{digest[:8]}{dest.suffix}"
+    if dest.exists() and os.path.samefile(dest, blob):
+        return dest
+    link_or_copy(blob, dest)
+    return dest
+
+
+def add_to_entry(
+    source: Path, dest_dir: Path, digest: str | None = None
+) -> tuple[str, Path]:
+    """Stores an uploaded file and links it into an entry; returns (digest, path).
+
+    The source is left in place for the caller to delete once the entry is safely
+    saved. Pass `digest` when the file was hashed as it was uploaded, so it isn't
+    read a second time here.
+    """
+    digest = digest or hash_file(source)
+    with _locked():
+        blob = _put(source, digest)
+        return digest, link_into(blob, digest, dest_dir, source.name)
+
+
+def update_manifest(entry_dir: Path, added: dict[str, str]) -> None:
+    """Records which blob each media file in an entry points at.
+
+    `added` maps paths relative to the entry (e.g. "images/a.jpg") to digests;
+    records for files no longer on disk are dropped.
+    """
+    manifest_path = entry_dir / MANIFEST_FILENAME
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except FileNotFoundError:
+        manifest = {}
+    manifest.update(added)
+    manifest = {
+        name: digest
+        for name, digest in sorted(manifest.items())
+        if (entry_dir / name).exists()
+    }
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=1))
+    tmp_path.replace(manifest_path)
+
+
+def _iter_blobs():
+    if BLOBS_DIR.is_dir():
+        yield from (path for path in BLOBS_DIR.glob("*/*") if path.is_file())
+
+
+def _iter_entry_media():
+    for class_dir in DATA_DIR.iterdir():
+        if not class_dir.is_dir() or class_dir.name.startswith("."):
+            continue
+        for entry_dir in class_dir.glob("*/*"):
+            if entry_dir.name.startswith("."):
+                continue
+            for dirname in MEDIA_DIRNAMES:
+                media_dir = entry_dir / dirname
+                if media_dir.is_dir():
+                    for path in media_dir.iterdir():
+                        if path.is_file():
+                            yield entry_dir, path
+
+
+def stats() -> BlobStats:
+    """Summarises the store: what is kept on disk versus what entries reference."""
+    result: BlobStats = {
+        "blobs": 0,
+        "stored_bytes": 0,
+        "referenced_bytes": 0,
+        "unreferenced": 0,
+    }
+    for blob in _iter_blobs():
+        stat = blob.stat()
+        result["blobs"] += 1
+        result["stored_bytes"] += stat.st_size
+        result["referenced_bytes"] += stat.st_size * (stat.st_nlink - 1)
+        result["unreferenced"] += stat.st_nlink == 1
+    return result
+
+
+def collect_garbage(dry_run: bool = False) -> tuple[int, int]:
+    """Deletes blobs no entry links to; returns (blobs removed, bytes freed)."""
+    removed = freed = 0
+    for blob in _iter_blobs():
+        # Locked per blob, so saves only wait for one check rather than the scan.
+        with _locked():
+            try:
+                stat = blob.stat()
+            except FileNotFoundError:
+                continue
+            if stat.st_nlink > 1:
+                continue
+            removed += 1
+            freed += stat.st_size
+            if not dry_run:
+                blob.unlink()
+    logging.info(f"Blob GC removed {removed} blobs ({freed} bytes)")
+    return removed, freed
+
+
+def migrate() -> int:
+    """Moves media saved before the blob store into it, deduplicating as it goes."""
+    migrated = 0
+    manifests: dict[Path, dict[str, str]] = {}
+    for entry_dir, path in _iter_entry_media():
+        if path.stat().st_nlink > 1:
+            continue
+        digest = hash_file(path)
+        blob = blob_path(digest, path.suffix)
+        with _locked():
+            if blob.exists():
+                tmp_path = path.with_name(f".{path.name}.tmp")
+                os.link(blob, tmp_path)
+                tmp_path.replace(path)
+            else:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                os.link(path, blob)
+        manifests.setdefault(entry_dir, {})[path.relative_to(entry_dir).as_posix()] = (
+            digest
+        )
+        migrated += 1
+    for entry_dir, added in manifests.items():
+        update_manifest(entry_dir, added)
+    return migrated
+
+
+def main(argv: list[str]) -> int:
+    command = argv[0] if argv else ""
+    if command == "stats":
+        result = stats()
+        print(
+            f"{result['blobs']} blobs, {result['stored_bytes']} bytes stored for "
+            f"{result['referenced_bytes']} bytes referenced, "
+            f"{result['unreferenced']} unreferenced."
+        )
+        return 0
+    if command == "gc":
+        dry_run = "--dry-run" in argv
+        removed, freed = collect_garbage(dry_run=dry_run)
+        verb = "Would remove" if dry_run else "Removed"
+        print(f"{verb} {removed} blobs ({freed} bytes).")
+        return 0
+    if command == "migrate":
+        print(f"Moved {migrate()} media files into {BLOBS_DIR}.")
+        return 0
+    print("usage: python -m app.blobs {stats|gc [--dry-run]|migrate}")
+    return 2
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main(sys.argv[1:]))
@@ -1,7 +1,14 @@
-import reflex as rx
 from typing import TypedDict
 
 
+class TranscriptSegment(TypedDict):
+    start: float
+    end: float
+    text: str
+    # (start, end, word) triples; empty unless word timestamps are enabled.
+    words: list[tuple[float, float, str]]
+
+
 class ClassInfo(TypedDict):
     name: str
     slug: str
@@ -31,4 +38,4 @@ CLASS_INFO: dict[str, ClassInfo] = {
 }
 SUPPORTED_IMAGES = [".png", ".jpg", ".jpeg", ".webp", ".heic"]
 SUPPORTED_VIDEOS = [".mp4", ".mov", ".avi", ".mkv"]
-SUPPORTED_AUDIO = [".wav", ".mp3"]
\ No newline at end of file
+SUPPORTED_AUDIO = [".wav", ".mp3", ".ogg", ".opus", ".webm", ".m4a"]
@@ -1,4 +1,5 @@
 import reflex as rx
+from app.config import GALLERY_ONLY
 from app.states.gallery_state import GalleryState
 
 
@@ -13,6 +14,7 @@ def gallery_page() -> rx.Component:
                         _gallery_content(),
                         class_name="max-w-4xl mx-auto p-4 sm:p-6 lg:p-8",
                     ),
+                    _prefetch_links(),
                     class_name="flex-1 overflow-auto bg-gray-50",
                 ),
                 class_name="flex h-screen bg-gray-50",
@@ -44,6 +46,12 @@ def _sidebar() -> rx.Component:
                     + GalleryState.selected_class_info["name"],
                     class_name="text-xl font-bold tracking-tight",
                 ),
+                rx.el.a(
+                    rx.icon("search", class_name="size-5"),
+                    href="/search",
+                    title="Search entries",
+                    class_name="ml-auto text-gray-500 hover:text-gray-800",
+                ),
                 class_name="flex h-16 items-center border-b px-6 gap-4",
             ),
             rx.el.div(_navigation_controls(), class_name="flex-1 overflow-auto p-4"),
@@ -79,16 +87,75 @@ def _navigation_controls() -> rx.Component:
             ),
             class_name="flex items-center justify-between mb-4",
         ),
-        rx.el.select(
-            rx.foreach(
-                GalleryState.available_dates,
-                lambda date: rx.el.option(date, value=date),
+        _date_list(),
+    )
+
+
+def _date_list() -> rx.Component:
+    """Shows the current window of dates grouped by month, with paging controls."""
+    page_button = "flex items-center gap-1 px-2 py-1 text-xs font-medium rounded-md border bg-white hover:bg-gray-100 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
+    return rx.el.div(
+        rx.el.div(
+            rx.el.button(
+                rx.icon("chevrons-left", class_name="size-3"),
+                "Newer",
+                on_click=GalleryState.newer_page,
+                disabled=~GalleryState.has_newer_page,
+                class_name=page_button,
+            ),
+            rx.el.span(GalleryState.window_label, class_name="text-xs text-gray-500"),
+            rx.el.button(
+                "Older",
+                rx.icon("chevrons-right", class_name="size-3"),
+                on_click=GalleryState.older_page,
+                disabled=~GalleryState.has_older_page,
+                class_name=page_button,
+            ),
+            class_name="flex items-center justify-between mb-3",
+        ),
+        rx.foreach(
+            GalleryState.date_groups,
+            lambda group: rx.el.div(
+                rx.el.h4(
+                    group["label"],
+                    class_name="px-2 py-1 text-xs font-semibold uppercase tracking-wide text-gray-500",
+                ),
+                rx.foreach(
+                    group["dates"],
+                    lambda item: rx.el.button(
+                        rx.cond(
+                            item["thumbnail"] != "",
+                            rx.el.img(
+                                src=item["thumbnail"],
+                                loading="lazy",
+                                class_name="size-9 shrink-0 rounded object-cover",
+                            ),
+                            rx.el.div(class_name="size-9 shrink-0 rounded bg-gray-100"),
+                        ),
+                        rx.el.div(
+                            rx.el.span(item["date"], class_name="block text-sm"),
+                            rx.el.span(
+                                item["description"],
+                                class_name="block text-xs font-normal text-gray-500",
+                            ),
+                            class_name="min-w-0",
+                        ),
+                        on_click=GalleryState.set_current_date(item["date"]),
+                        title=item["notes_preview"],
+                        class_name=rx.cond(
+                            item["date"] == GalleryState.current_date,
+                            "flex w-full items-center gap-3 text-left px-3 py-1.5 rounded-md font-semibold bg-gray-100",
+                            "flex w-full items-center gap-3 text-left px-3 py-1.5 rounded-md text-gray-700 hover:bg-gray-50",
+                        ),
+                        style=rx.cond(
+                            item["date"] == GalleryState.current_date,
+                            {"color": GalleryState.accent_color},
+                            {},
+                        ),
+                    ),
+                ),
+                class_name="mb-2",
             ),
-            value=GalleryState.current_date,
-            on_change=GalleryState.set_current_date,
-            size="3",
-            class_name="w-full text-base",
-            style={"--accent-color": GalleryState.accent_color},
         ),
     )
 
@@ -100,49 +167,82 @@ def _gallery_content() -> rx.Component:
             class_name="text-2xl font-semibold text-gray-800 mb-6",
         ),
         rx.el.div(
-            rx.cond(
-                GalleryState.current_entry["images"].length() > 0,
-                _image_grid(),
-                rx.fragment(),
-            ),
-            rx.cond(
-                GalleryState.current_entry["videos"].length() > 0,
-                _video_section(),
-                rx.fragment(),
-            ),
-            rx.cond(
-                GalleryState.current_entry["audio_path"],
-                _audio_section(),
-                rx.fragment(),
-            ),
-            rx.cond(
-                GalleryState.current_entry["typed_text"] != "",
-                _notes_section(),
-                rx.fragment(),
-            ),
-            rx.cond(
-                GalleryState.current_entry["transcript"] != "",
-                _transcript_section(),
-                rx.fragment(),
+            rx.foreach(GalleryState.current_entries, _entry_view),
+            class_name="space-y-12",
+        ),
+    )
+
+
+def _entry_view(entry: rx.Var) -> rx.Component:
+    return rx.el.div(
+        rx.cond(
+            GalleryState.current_entries.length() > 1,
+            rx.el.div(
+                rx.icon("clock", class_name="size-4"),
+                rx.el.span(f"Saved at {entry['saved_at']}"),
+                class_name="flex items-center gap-2 text-sm font-medium text-gray-500",
             ),
-            class_name="space-y-8",
+            rx.fragment(),
+        ),
+        rx.cond(
+            entry["image_variants"].length() > 0,
+            _image_grid(entry),
+            rx.fragment(),
+        ),
+        rx.cond(
+            entry["video_variants"].length() > 0,
+            _video_section(entry),
+            rx.fragment(),
         ),
+        rx.cond(
+            entry["audio_path"],
+            _audio_section(entry),
+            rx.fragment(),
+        ),
+        rx.cond(
+            entry["typed_text"] != "",
+            _notes_section(entry),
+            rx.fragment(),
+        ),
+        rx.cond(
+            entry["transcript"] != "",
+            _transcript_section(entry),
+            rx.fragment(),
+        ),
+        id=f"entry-{entry['id']}",
+        class_name="space-y-8",
+    )
+
+
+def _prefetch_links() -> rx.Component:
+    """Lets the browser fetch neighbouring entries' thumbnails while idle."""
+    return rx.fragment(
+        rx.foreach(
+            GalleryState.prefetch_urls,
+            lambda url: rx.el.link(rel="prefetch", href=url),
+        )
     )
 
 
-def _image_grid() -> rx.Component:
+def _image_grid(entry: rx.Var) -> rx.Component:
     return _content_card(
         "images",
         "Image Gallery",
         rx.el.div(
             rx.foreach(
-                GalleryState.current_entry["images"],
-                lambda img_path: rx.el.div(
-                    rx.el.image(
-                        src=rx.get_upload_url(img_path.to_string()),
+                entry["image_variants"],
+                lambda variant: rx.el.a(
+                    rx.el.img(
+                        src=variant["src"],
+                        src_set=variant["srcset"],
+                        sizes="(min-width: 1024px) 12rem, (min-width: 768px) 33vw, 50vw",
+                        loading="lazy",
+                        decoding="async",
                         class_name="aspect-square w-full rounded-lg object-cover",
                     ),
-                    class_name="overflow-hidden rounded-lg",
+                    href=variant["original"],
+                    target="_blank",
+                    class_name="block overflow-hidden rounded-lg",
                 ),
             ),
             class_name="grid grid-cols-2 md:grid-cols-3 lg:grid-cols-4 gap-4",
@@ -150,15 +250,17 @@ def _image_grid() -> rx.Component:
     )
 
 
-def _video_section() -> rx.Component:
+def _video_section(entry: rx.Var) -> rx.Component:
     return _content_card(
         "video",
         "Video Clips",
         rx.el.div(
             rx.foreach(
-                GalleryState.current_entry["videos"],
-                lambda video_path: rx.el.video(
-                    src=rx.get_upload_url(video_path.to_string()),
+                entry["video_variants"],
+                lambda variant: rx.el.video(
+                    src=variant["src"],
+                    poster=variant["poster"],
+                    preload="none",
                     controls=True,
                     class_name="w-full rounded-lg",
                 ),
@@ -168,36 +270,72 @@ def _video_section() -> rx.Component:
     )
 
 
-def _audio_section() -> rx.Component:
+def _audio_section(entry: rx.Var) -> rx.Component:
     return _content_card(
         "mic",
         "Audio Recording",
         rx.el.audio(
-            src=rx.get_upload_url(GalleryState.current_entry["audio_path"].to_string()),
+            rx.el.source(
+                src=entry["audio_path"].to_string(),
+                type=entry["audio_type"],
+            ),
+            # Changing a <source> doesn't reload the player, so remount it instead.
+            key=entry["audio_path"].to_string(),
+            id=f"entry-audio-{entry['id']}",
+            preload="metadata",
             controls=True,
             class_name="w-full",
         ),
     )
 
 
-def _notes_section() -> rx.Component:
+def _notes_section(entry: rx.Var) -> rx.Component:
     return _content_card(
         "square-pen",
         "Notes",
         rx.el.p(
-            GalleryState.current_entry["typed_text"],
+            entry["typed_text"],
             class_name="text-gray-700 whitespace-pre-wrap",
         ),
     )
 
 
-def _transcript_section() -> rx.Component:
+def _transcript_section(entry: rx.Var) -> rx.Component:
     return _content_card(
         "quote",
         "Transcript",
-        rx.el.p(
-            GalleryState.current_entry["transcript"],
-            class_name="text-gray-700 whitespace-pre-wrap",
+        rx.cond(
+            entry["has_segments"],
+            rx.el.button(
+                rx.icon("clock", class_name="size-4"),
+                rx.cond(entry["show_timestamps"], "Hide timestamps", "Show timestamps"),
+                on_click=GalleryState.toggle_timestamps(entry["id"]),
+                class_name="flex items-center gap-2 mb-3 px-3 py-1.5 text-sm font-medium rounded-md border bg-white hover:bg-gray-100 transition-colors",
+            ),
+            rx.fragment(),
+        ),
+        rx.cond(
+            entry["show_timestamps"],
+            rx.el.div(
+                rx.foreach(
+                    entry["segments"],
+                    lambda segment: rx.el.button(
+                        rx.el.span(
+                            segment["label"],
+                            class_name="shrink-0 font-mono text-xs text-gray-500 pt-0.5",
+                        ),
+                        rx.el.span(segment["text"], class_name="text-gray-700"),
+                        on_click=GalleryState.seek_audio(entry["id"], segment["start"]),
+                        title="Play from here",
+                        class_name="flex w-full gap-3 text-left px-2 py-1 rounded-md hover:bg-gray-50",
+                    ),
+                ),
+                class_name="space-y-1",
+            ),
+            rx.el.p(
+                entry["transcript"],
+                class_name="text-gray-700 whitespace-pre-wrap",
+            ),
         ),
     )
 
@@ -217,7 +355,7 @@ def _content_card(icon: str, title: str, *children) -> rx.Component:
 
 
 def _empty_state() -> rx.Component:
-    return rx.el.div(
+    children = [
         rx.icon("folder-search", class_name="size-16 text-gray-400"),
         rx.el.h3(
             "No Entries Found", class_name="mt-4 text-xl font-semibold text-gray-700"
@@ -226,13 +364,19 @@ def _empty_state() -> rx.Component:
             f"There are no entries for {GalleryState.selected_class_info['name']} yet.",
             class_name="mt-2 text-sm text-gray-500",
         ),
-        rx.el.a(
-            rx.el.button(
-                "Create an Entry",
-                class_name="mt-6 inline-flex items-center px-4 py-2 border border-transparent text-sm font-medium rounded-md shadow-sm text-white",
-                style={"background_color": GalleryState.accent_color},
-            ),
-            href="/",
-        ),
+    ]
+    if not GALLERY_ONLY:
+        children.append(
+            rx.el.a(
+                rx.el.button(
+                    "Create an Entry",
+                    class_name="mt-6 inline-flex items-center px-4 py-2 border border-transparent text-sm font-medium rounded-md shadow-sm text-white",
+                    style={"background_color": GalleryState.accent_color},
+                ),
+                href="/",
+            )
+        )
+    return rx.el.div(
+        *children,
         class_name="flex flex-col items-center justify-center h-full text-center",
-    )
\ No newline at end of file
+    )
@@ -1,6 +1,9 @@
 import reflex as rx
+from reflex.config import get_config
 from app.states.recorder_state import RecorderState
 from app import classes
+from app.config import LIVE_CHUNK_SECONDS, UPLOAD_PARALLEL_CHUNKS
+from app.uploads import LIVE_AUDIO_ROUTE, UPLOAD_ROUTE
 
 
 def recorder_page() -> rx.Component:
@@ -36,6 +39,7 @@ def recorder_page() -> rx.Component:
             class_name="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-12 md:py-20",
         ),
         _recorder_script(),
+        _video_upload_script(),
         class_name="font-['Inter'] bg-gray-50 min-h-screen",
     )
 
@@ -77,6 +81,12 @@ def _gallery_links() -> rx.Component:
             ),
             class_name="grid grid-cols-1 sm:grid-cols-3 gap-4",
         ),
+        rx.el.a(
+            rx.icon("search", class_name="mr-2 size-4"),
+            "Search all notes and transcripts",
+            href="/search",
+            class_name="mt-4 inline-flex items-center text-sm font-medium text-gray-600 hover:text-gray-900",
+        ),
     )
 
 
@@ -127,14 +137,7 @@ def _file_uploaders() -> rx.Component:
                 max_files=5,
                 on_select=RecorderState.handle_image_upload,
             ),
-            _file_upload_component(
-                id="video_upload",
-                icon="video",
-                text="Upload Videos (up to 2)",
-                accept={"video/*": classes.SUPPORTED_VIDEOS},
-                max_files=2,
-                on_select=RecorderState.handle_video_upload,
-            ),
+            _video_upload_component(),
             class_name="grid grid-cols-1 sm:grid-cols-2 gap-4",
         ),
     )
@@ -181,6 +184,82 @@ def _file_upload_component(
     )
 
 
+def _video_upload_component() -> rx.Component:
+    """Video picker backed by the resumable chunked uploader in _video_upload_script."""
+    return rx.el.div(
+        rx.el.label(
+            rx.el.div(
+                rx.icon(
+                    "video",
+                    class_name="w-8 h-8 mb-2",
+                    style={"color": RecorderState.accent_color},
+                ),
+                rx.el.p(
+                    "Upload Videos (up to 2)",
+                    class_name="text-sm font-medium text-gray-700",
+                ),
+                id="video-dropzone",
+                class_name="flex flex-col items-center justify-center p-6 border-2 border-dashed border-gray-300 rounded-lg cursor-pointer hover:bg-gray-100 transition-colors",
+            ),
+            rx.el.input(
+                type="file",
+                id="video-upload-input",
+                multiple=True,
+                accept=",".join(["video/*", *classes.SUPPORTED_VIDEOS]),
+                on_change=RecorderState.start_video_uploads,
+                class_name="hidden",
+            ),
+            class_name="block w-full",
+        ),
+        rx.el.div(
+            rx.foreach(
+                RecorderState.video_uploads,
+                lambda upload: rx.el.div(
+                    rx.el.div(
+                        rx.icon("file", class_name="w-4 h-4 mr-2 shrink-0"),
+                        rx.el.span(upload["filename"], class_name="text-xs truncate"),
+                        rx.el.span(
+                            rx.match(
+                                upload["status"],
+                                ("complete", "Done"),
+                                ("stalled", "Stalled"),
+                                ("failed", "Failed"),
+                                f"{upload['percent']}%",
+                            ),
+                            class_name="ml-auto pl-2 text-xs text-gray-500",
+                        ),
+                        class_name="flex items-center",
+                    ),
+                    rx.el.div(
+                        rx.el.div(
+                            class_name="h-1 rounded-full",
+                            style={
+                                "width": f"{upload['percent']}%",
+                                "background_color": RecorderState.accent_color,
+                            },
+                        ),
+                        class_name="mt-1 h-1 w-full rounded-full bg-gray-200",
+                    ),
+                    class_name="bg-gray-100 p-1 rounded-md",
+                ),
+            ),
+            class_name="mt-2 space-y-1",
+        ),
+        rx.cond(
+            RecorderState.has_stalled_uploads,
+            rx.el.button(
+                rx.icon("refresh-cw", class_name="w-4 h-4 mr-2"),
+                "Resume uploads",
+                type="button",
+                on_click=RecorderState.resume_video_uploads,
+                class_name="mt-2 flex items-center px-3 py-1.5 text-sm font-medium rounded-md border bg-white hover:bg-gray-100 transition-colors",
+            ),
+            rx.fragment(),
+        ),
+        class_name="bg-white p-4 rounded-xl border border-gray-200 shadow-sm",
+    )
+
+
 def _voice_recorder() -> rx.Component:
     return rx.el.div(
         _form_section_header("mic", "Voice Recording"),
@@ -222,7 +301,7 @@ def _voice_recorder() -> rx.Component:
                     "processing",
                     rx.el.div(
                         rx.spinner(class_name="mr-2"),
-                        "Processing...",
+                        RecorderState.processing_message,
                         class_name="flex items-center justify-center px-6 py-3 rounded-xl bg-yellow-500 text-white font-semibold w-full",
                     ),
                 ),
@@ -269,9 +348,43 @@ def _notes_and_transcript_section() -> rx.Component:
 
 
 def _recorder_script() -> rx.Component:
-    return rx.script("""
+    """Records audio in timeslices and sends each one to the live-audio endpoint.
+
+    The backend transcribes the recording as it grows. Stopping resolves with the
+    file extension once every timeslice has arrived, or null if any was lost.
+    """
+    return rx.script(
+        f"const LIVE_CHUNK_MS = {LIVE_CHUNK_SECONDS * 1000};"
+        f"const LIVE_AUDIO_URL = '{get_config().api_url}{LIVE_AUDIO_ROUTE}';"
+        + """
+const LIVE_AUDIO_MAX_ATTEMPTS = 5;
 let mediaRecorder;
-let audioChunks = [];
+let sentBytes = 0;
+let liveUploads = Promise.resolve(true);
+
+async function sendTimeslice(id, blob) {
+    for (let attempt = 1; attempt <= LIVE_AUDIO_MAX_ATTEMPTS; attempt++) {
+        try {
+            const url = `${LIVE_AUDIO_URL}/${id}?offset=${sentBytes}`;
+            const response = await fetch(url, {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/octet-stream' },
+                body: blob,
+            });
+            if (response.ok) {
+                sentBytes = (await response.json()).size;
+                return true;
+            }
+            // Only server errors are worth retrying; a gap or an unknown ID is not.
+            if (response.status < 500) break;
+        } catch (err) {
+            console.warn(`Audio timeslice failed (attempt ${attempt}):`, err);
+        }
+        await new Promise((resolve) => setTimeout(resolve, 250 * 2 ** attempt));
+    }
+    console.error('Failed to upload audio timeslice; the recording is incomplete.');
+    return false;
+}
 
 window.checkRecorderSupport = function() {
     if (!navigator.mediaDevices || !window.MediaRecorder) {
@@ -281,44 +394,22 @@ window.checkRecorderSupport = function() {
     return 'idle';
 }
 
-window.startRecording = async function() {
+window.startRecording = async function(id) {
     if (window.checkRecorderSupport() === 'unsupported') {
         return 'unsupported';
     }
     try {
         const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
         mediaRecorder = new MediaRecorder(stream);
+        sentBytes = 0;
+        liveUploads = Promise.resolve(true);
         mediaRecorder.ondataavailable = (event) => {
-            if (event.data.size > 0) audioChunks.push(event.data);
+            if (event.data.size === 0) return;
+            // Timeslices go one at a time, in order, so the backend can append them.
+            const blob = event.data;
+            liveUploads = liveUploads.then((ok) => ok && sendTimeslice(id, blob));
         };
-        mediaRecorder.onstop = async () => {
-            if (audioChunks.length === 0) {
-                console.error('No audio data recorded.');
-                return 'error'; 
-            }
-            const audioBlob = new Blob(audioChunks, { type: 'audio/wav' });
-            const file = new File([audioBlob], 'recording.wav', { type: 'audio/wav' });
-
-            // Use a specific event handler for processing the audio blob
-            const process_event = window.reflex_handlers.process_audio_and_transcribe;
-            if (process_event) {
-                // Create a temporary file object for the backend
-                const temp_file = {
-                    name: file.name,
-                    type: file.type,
-                    size: file.size,
-                    lastModified: file.lastModified,
-                };
-                // Use rx.upload to send the file to the backend
-                const files = [file];
-                const uploadController = new rx.UploadController(process_event, files);
-                await uploadController.start();
-            } else {
-                console.error('Reflex event handler for audio processing not found.');
-            }
-            audioChunks = [];
-        };
-        mediaRecorder.start();
+        mediaRecorder.start(LIVE_CHUNK_MS);
         return 'recording';
     } catch (err) {
         console.error('Error starting recording:', err.name, err.message);
@@ -330,11 +421,191 @@ window.startRecording = async function() {
 }
 
 window.stopRecording = function() {
-    if (mediaRecorder && mediaRecorder.state !== 'inactive') {
+    if (!mediaRecorder || mediaRecorder.state === 'inactive') {
+        return null;
+    }
+    return new Promise((resolve) => {
+        mediaRecorder.onstop = async () => {
+            mediaRecorder.stream.getTracks().forEach((track) => track.stop());
+            // The final timeslice is queued before the stop event fires.
+            const ok = await liveUploads;
+            if (!ok || sentBytes === 0) {
+                resolve(null);
+                return;
+            }
+            // Label the recording with the container the browser actually produced
+            const mimeType = mediaRecorder.mimeType || 'audio/webm';
+            resolve(
+                mimeType.includes('ogg') ? 'ogg'
+                    : mimeType.includes('mp4') ? 'm4a'
+                    : 'webm'
+            );
+        };
         mediaRecorder.stop();
+    });
+}
+"""
+    )
+
+
+def _video_upload_script() -> rx.Component:
+    """Uploads videos in checksummed chunks, several at a time, resuming after drops.
+
+    Each file's upload id is remembered in localStorage, so picking the same file
+    again after a reload carries on from the chunks the server already has.
+    """
+    return rx.script(
+        f"const UPLOAD_URL = '{get_config().api_url}{UPLOAD_ROUTE}';"
+        f"const UPLOAD_PARALLEL_CHUNKS = {UPLOAD_PARALLEL_CHUNKS};"
+        + """
+const UPLOAD_MAX_ATTEMPTS = 8;
+const videoUploads = {};
+
+const uploadKey = (file) =>
+    `artifactmaker-upload:${file.name}:${file.size}:${file.lastModified}`;
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+async function sha256Base64(buffer) {
+    // crypto.subtle only exists in secure contexts; the server then skips the check
+    if (!window.crypto || !window.crypto.subtle) return null;
+    const digest = new Uint8Array(await crypto.subtle.digest('SHA-256', buffer));
+    return btoa(String.fromCharCode(...digest));
+}
+
+async function openUpload(file) {
+    const saved = localStorage.getItem(uploadKey(file));
+    if (saved) {
+        const response = await fetch(`${UPLOAD_URL}/${saved}`);
+        if (response.ok) return response.json();
+        localStorage.removeItem(uploadKey(file));
+    }
+    const response = await fetch(UPLOAD_URL, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, size: file.size }),
+    });
+    if (!response.ok) {
+        throw new Error(`Could not start uploading ${file.name}: ${response.status}`);
+    }
+    const status = await response.json();
+    localStorage.setItem(uploadKey(file), status.id);
+    return status;
+}
+
+async function sendChunk(upload, index) {
+    const { status, file } = upload;
+    const start = index * status.chunk_size;
+    const buffer = await file.slice(start, start + status.chunk_size).arrayBuffer();
+    const headers = { 'Content-Type': 'application/offset+octet-stream' };
+    const checksum = await sha256Base64(buffer);
+    if (checksum) headers['Upload-Checksum'] = `sha256 ${checksum}`;
+    for (let attempt = 1; !upload.cancelled; attempt++) {
+        if (!navigator.onLine) {
+            await new Promise((resolve) => {
+                window.addEventListener('online', resolve, { once: true });
+            });
+        }
+        try {
+            const response = await fetch(`${UPLOAD_URL}/${status.id}/${index}`, {
+                method: 'PUT', headers, body: buffer,
+            });
+            if (response.ok) return;
+            if (response.status === 404 || response.status === 413) {
+                localStorage.removeItem(uploadKey(file));
+                const error = new Error(`Upload of ${file.name} was rejected`);
+                throw Object.assign(error, { fatal: true });
+            }
+        } catch (err) {
+            if (err.fatal) throw err;
+            console.warn(
+                `Chunk ${index} of ${file.name} failed (attempt ${attempt}):`, err
+            );
+        }
+        if (attempt >= UPLOAD_MAX_ATTEMPTS) {
+            throw new Error(`Chunk ${index} of ${file.name} kept failing`);
+        }
+        await sleep(Math.min(30000, 500 * 2 ** attempt));
     }
 }
-""")
+
+function runUpload(upload) {
+    if (upload.running) return;
+    upload.running = true;
+    const { status, file } = upload;
+    const received = new Set(status.received);
+    const count = Math.max(1, Math.ceil(file.size / status.chunk_size));
+    const pending = [...Array(count).keys()].filter((index) => !received.has(index));
+    let failure = null;
+    const worker = async () => {
+        while (pending.length && !upload.cancelled && !failure) {
+            try {
+                await sendChunk(upload, pending.shift());
+            } catch (err) {
+                failure = err;
+            }
+        }
+    };
+    Promise.all(Array.from({ length: UPLOAD_PARALLEL_CHUNKS }, worker)).then(() => {
+        upload.running = false;
+        if (failure) console.error(`Upload of ${file.name} stopped:`, failure);
+        else if (!upload.cancelled) localStorage.removeItem(uploadKey(file));
+    });
+}
+
+const describeUpload = (id) =>
+    ({ id, filename: videoUploads[id].file.name, size: videoUploads[id].file.size });
+
+window.clearVideoUploads = function(inputId) {
+    for (const id of Object.keys(videoUploads)) {
+        videoUploads[id].cancelled = true;
+        delete videoUploads[id];
+    }
+    const input = document.getElementById(inputId);
+    if (input) input.value = '';
+}
+
+window.startVideoUploads = async function(inputId, maxFiles) {
+    const input = document.getElementById(inputId);
+    const files = Array.from(input ? input.files : []).slice(0, maxFiles);
+    window.clearVideoUploads();
+    for (const file of files) {
+        try {
+            const status = await openUpload(file);
+            videoUploads[status.id] = { file, status };
+            runUpload(videoUploads[status.id]);
+        } catch (err) {
+            console.error(err);
+        }
+    }
+    return Object.keys(videoUploads).map(describeUpload);
+}
+
+window.resumeVideoUploads = async function() {
+    for (const [id, upload] of Object.entries(videoUploads)) {
+        if (upload.running) continue;
+        const response = await fetch(`${UPLOAD_URL}/${id}`);
+        if (!response.ok) continue;
+        upload.status = await response.json();
+        if (!upload.status.complete) runUpload(upload);
+    }
+    return Object.keys(videoUploads).map(describeUpload);
+}
+
+// Dropping files on the picker feeds them through the same input.
+document.addEventListener('dragover', (event) => {
+    if (event.target.closest && event.target.closest('#video-dropzone')) {
+        event.preventDefault();
+    }
+});
+document.addEventListener('drop', (event) => {
+    if (!event.target.closest || !event.target.closest('#video-dropzone')) return;
+    event.preventDefault();
+    const input = document.getElementById('video-upload-input');
+    input.files = event.dataTransfer.files;
+    input.dispatchEvent(new Event('change', { bubbles: true }));
+});
+"""
+    )
 
 
 def _troubleshooting_card(error_type: str) -> rx.Component:
@@ -379,4 +650,4 @@ def _form_section_header(icon: str, title: str) -> rx.Component:
         ),
         rx.el.h3(title, class_name="text-lg font-semibold text-gray-800"),
         class_name="flex items-center space-x-3 mb-4",
-    )
\ No newline at end of file
+    )
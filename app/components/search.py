@@ -0,0 +1,92 @@
+import reflex as rx
+from app.states.search_state import SearchState
+
+
+def search_page() -> rx.Component:
+    return rx.el.main(
+        rx.el.div(
+            rx.el.div(
+                rx.el.a(
+                    rx.icon("book-marked", class_name="size-7"),
+                    href="/",
+                    class_name="flex items-center gap-2 font-bold text-xl",
+                ),
+                rx.el.h1(
+                    "Search Entries",
+                    class_name="text-3xl font-bold text-gray-800 tracking-tight",
+                ),
+                class_name="flex items-center gap-4 mb-8",
+            ),
+            _search_form(),
+            rx.cond(
+                SearchState.has_searched,
+                _results(),
+                rx.fragment(),
+            ),
+            class_name="max-w-4xl mx-auto px-4 sm:px-6 lg:px-8 py-12",
+        ),
+        class_name="font-['Inter'] bg-gray-50 min-h-screen",
+    )
+
+
+def _search_form() -> rx.Component:
+    return rx.el.form(
+        rx.el.div(
+            rx.icon("search", class_name="size-5 text-gray-400"),
+            rx.el.input(
+                name="query",
+                placeholder="Search notes and transcripts, e.g. titration molarity",
+                default_value=SearchState.query,
+                auto_focus=True,
+                class_name="flex-1 bg-transparent outline-none text-base",
+            ),
+            rx.el.button(
+                "Search",
+                type="submit",
+                class_name="px-4 py-2 rounded-lg bg-gray-800 text-white text-sm font-semibold",
+            ),
+            class_name="flex items-center gap-3 p-3 bg-white rounded-xl border border-gray-200 shadow-sm",
+        ),
+        on_submit=SearchState.run_search,
+        class_name="mb-8",
+    )
+
+
+def _results() -> rx.Component:
+    return rx.el.div(
+        rx.el.p(
+            f"{SearchState.result_count} result(s) in {SearchState.elapsed_ms} ms",
+            class_name="text-sm text-gray-500 mb-4",
+        ),
+        rx.el.div(
+            rx.foreach(SearchState.results, _result_card),
+            class_name="space-y-4",
+        ),
+    )
+
+
+def _result_card(hit: rx.Var) -> rx.Component:
+    return rx.el.a(
+        rx.el.div(
+            rx.el.span(
+                hit["emoji"] + " " + hit["class_name"],
+                class_name="text-sm font-semibold",
+                style={"color": hit["accent_color"]},
+            ),
+            rx.el.span(hit["date_str"], class_name="text-sm text-gray-500"),
+            class_name="flex items-center justify-between mb-2",
+        ),
+        rx.el.p(
+            rx.foreach(
+                hit["snippet"],
+                lambda part: rx.cond(
+                    part["match"],
+                    rx.el.mark(part["text"], class_name="bg-yellow-100 rounded px-0.5"),
+                    rx.el.span(part["text"]),
+                ),
+            ),
+            class_name="text-gray-700 text-sm",
+        ),
+        href=hit["href"],
+        class_name="block bg-white p-4 rounded-xl border border-gray-200 shadow-sm hover:border-gray-300",
+    )
@@ -0,0 +1,90 @@
+import os
+from pathlib import Path
+
+DATA_DIR = Path("data/")
+# Serves only the gallery and search, for workers that never record or transcribe.
+GALLERY_ONLY = os.environ.get("ARTIFACTMAKER_GALLERY_ONLY", "0") == "1"
+INDEX_PATH = Path(
+    os.environ.get("ARTIFACTMAKER_INDEX_PATH", DATA_DIR / "index.sqlite3")
+)
+
+TRANSCRIPTION_WORKERS = int(
+    os.environ.get(
+        "ARTIFACTMAKER_TRANSCRIPTION_WORKERS", max(1, (os.cpu_count() or 2) // 2)
+    )
+)
+TRANSCRIPTION_QUEUE_SIZE = int(
+    os.environ.get("ARTIFACTMAKER_TRANSCRIPTION_QUEUE_SIZE", 32)
+)
+# When set, transcription goes to the daemon on this socket (python -m
+# app.transcription_server) instead of loading Whisper in every backend process.
+TRANSCRIPTION_SOCKET = os.environ.get("ARTIFACTMAKER_TRANSCRIPTION_SOCKET", "")
+TRANSCRIPTION_SERVER_TIMEOUT = float(
+    os.environ.get("ARTIFACTMAKER_TRANSCRIPTION_SERVER_TIMEOUT", 30)
+)
+LIVE_CHUNK_SECONDS = int(os.environ.get("ARTIFACTMAKER_LIVE_CHUNK_SECONDS", 5))
+
+WHISPER_MODEL = os.environ.get("ARTIFACTMAKER_WHISPER_MODEL", "small.en")
+WHISPER_COMPUTE_TYPE = os.environ.get("ARTIFACTMAKER_WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_CPU_THREADS = int(os.environ.get("ARTIFACTMAKER_WHISPER_CPU_THREADS", 0))
+WHISPER_NUM_WORKERS = int(os.environ.get("ARTIFACTMAKER_WHISPER_NUM_WORKERS", 1))
+WHISPER_WORD_TIMESTAMPS = (
+    os.environ.get("ARTIFACTMAKER_WHISPER_WORD_TIMESTAMPS", "0") == "1"
+)
+WHISPER_PROFILE = os.environ.get("ARTIFACTMAKER_WHISPER_PROFILE", "balanced")
+WHISPER_VAD = os.environ.get("ARTIFACTMAKER_WHISPER_VAD", "1") == "1"
+WHISPER_VAD_MIN_SILENCE_MS = int(
+    os.environ.get("ARTIFACTMAKER_WHISPER_VAD_MIN_SILENCE_MS", 1000)
+)
+WHISPER_PRELOAD = [
+    name.strip()
+    for name in os.environ.get("ARTIFACTMAKER_WHISPER_PRELOAD", WHISPER_MODEL).split(
+        ","
+    )
+    if name.strip()
+]
+
+TRANSCRIPT_CACHE_DIR = Path(
+    os.environ.get(
+        "ARTIFACTMAKER_TRANSCRIPT_CACHE_DIR", DATA_DIR / ".cache" / "transcripts"
+    )
+)
+TRANSCRIPT_CACHE_MAX_BYTES = int(
+    os.environ.get("ARTIFACTMAKER_TRANSCRIPT_CACHE_MAX_BYTES", 64 * 2**20)
+)
+
+AUDIO_BITRATE = os.environ.get("ARTIFACTMAKER_AUDIO_BITRATE", "32k")
+KEEP_ORIGINAL_AUDIO = os.environ.get("ARTIFACTMAKER_KEEP_ORIGINAL_AUDIO", "0") == "1"
+
+STORAGE_READ_CONCURRENCY = int(
+    os.environ.get("ARTIFACTMAKER_STORAGE_READ_CONCURRENCY", 8)
+)
+STORAGE_WRITE_CONCURRENCY = int(
+    os.environ.get("ARTIFACTMAKER_STORAGE_WRITE_CONCURRENCY", 2)
+)
+
+UPLOAD_CHUNK_SIZE = int(os.environ.get("ARTIFACTMAKER_UPLOAD_CHUNK_SIZE", 8 * 2**20))
+UPLOAD_PARALLEL_CHUNKS = int(os.environ.get("ARTIFACTMAKER_UPLOAD_PARALLEL_CHUNKS", 3))
+UPLOAD_MAX_BYTES = int(os.environ.get("ARTIFACTMAKER_UPLOAD_MAX_BYTES", 4 * 2**30))
+UPLOAD_EXPIRY_SECONDS = int(
+    os.environ.get("ARTIFACTMAKER_UPLOAD_EXPIRY_SECONDS", 24 * 3600)
+)
+
+VIDEO_WORKERS = int(os.environ.get("ARTIFACTMAKER_VIDEO_WORKERS", 1))
+VIDEO_MAX_BITRATE = os.environ.get("ARTIFACTMAKER_VIDEO_MAX_BITRATE", "2M")
+VIDEO_MAX_WIDTH = int(os.environ.get("ARTIFACTMAKER_VIDEO_MAX_WIDTH", 1280))
+
+METRICS_ENABLED = os.environ.get("ARTIFACTMAKER_METRICS", "0") == "1"
+METRICS_ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.environ.get(
+        "ARTIFACTMAKER_METRICS_ALLOWED_HOSTS", "127.0.0.1,::1"
+    ).split(",")
+    if host.strip()
+]
+
+ENTRY_CACHE_SIZE = int(os.environ.get("ARTIFACTMAKER_ENTRY_CACHE_SIZE", 128))
+GALLERY_PREFETCH_NEIGHBORS = int(
+    os.environ.get("ARTIFACTMAKER_GALLERY_PREFETCH_NEIGHBORS", 2)
+)
+GALLERY_PAGE_SIZE = int(os.environ.get("ARTIFACTMAKER_GALLERY_PAGE_SIZE", 50))
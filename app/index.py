@@ -0,0 +1,478 @@
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import TypedDict
+from app import media
+from app.config import DATA_DIR, INDEX_PATH
+
+_local = threading.local()
+
+# Bump when the schema changes; older index files are dropped and rebuilt from disk.
+SCHEMA_VERSION = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    class_slug TEXT NOT NULL,
+    date_str TEXT NOT NULL,
+    entry_id TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    image_count INTEGER NOT NULL DEFAULT 0,
+    image_bytes INTEGER NOT NULL DEFAULT 0,
+    video_count INTEGER NOT NULL DEFAULT 0,
+    video_bytes INTEGER NOT NULL DEFAULT 0,
+    has_audio INTEGER NOT NULL DEFAULT 0,
+    notes_length INTEGER NOT NULL DEFAULT 0,
+    transcript_length INTEGER NOT NULL DEFAULT 0,
+    notes_first_line TEXT NOT NULL DEFAULT '',
+    thumbnail TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (class_slug, date_str, entry_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entry_docs (
+    doc_id INTEGER PRIMARY KEY,
+    class_slug TEXT NOT NULL,
+    date_str TEXT NOT NULL,
+    entry_id TEXT NOT NULL,
+    UNIQUE (class_slug, date_str, entry_id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS entry_text USING fts5(
+    notes, transcript, tokenize = 'porter unicode61'
+);
+"""
+
+_DROP_SCHEMA = """
+DROP TABLE IF EXISTS entries;
+DROP TABLE IF EXISTS entry_docs;
+DROP TABLE IF EXISTS entry_text;
+"""
+
+SNIPPET_TOKENS = 16
+# Control characters that can't appear in notes mark matches inside snippets.
+_MATCH_START, _MATCH_END = "\x02", "\x03"
+
+NOTES_FIRST_LINE_LENGTH = 120
+
+# Entries within a date are named by save time, to the microsecond, plus a random
+# suffix, so they sort chronologically and two saves at once never collide. IDs
+# made before microseconds were added sort before later ones from the same second.
+ENTRY_ID_PATTERN = re.compile(r"\d{8}T\d{6}(?:\d{6})?-[0-9a-f]{6}")
+
+
+class EntrySummary(TypedDict):
+    date_str: str
+    entry_count: int
+    image_count: int
+    image_bytes: int
+    video_count: int
+    video_bytes: int
+    has_audio: bool
+    notes_length: int
+    transcript_length: int
+    notes_first_line: str
+    thumbnail: str
+
+
+_SUMMARY_COLUMNS = list(EntrySummary.__annotations__)
+# What is stored per entry; a date's summary aggregates these.
+_ENTRY_COLUMNS = [
+    column for column in _SUMMARY_COLUMNS if column not in ("date_str", "entry_count")
+]
+
+# One row per date: counts and sizes add up, while the notes preview and the
+# thumbnail come from the earliest entry that has one.
+_DATE_SUMMARY_SELECT = """
+SELECT date_str, COUNT(*), SUM(image_count), SUM(image_bytes), SUM(video_count),
+    SUM(video_bytes), MAX(has_audio), SUM(notes_length), SUM(transcript_length),
+    COALESCE((
+        SELECT notes_first_line FROM entries n
+        WHERE n.class_slug = e.class_slug AND n.date_str = e.date_str
+            AND n.notes_first_line != ''
+        ORDER BY n.entry_id LIMIT 1
+    ), ''),
+    COALESCE((
+        SELECT thumbnail FROM entries t
+        WHERE t.class_slug = e.class_slug AND t.date_str = e.date_str
+            AND t.thumbnail != ''
+        ORDER BY t.entry_id LIMIT 1
+    ), '')
+FROM entries e
+"""
+
+
+class SnippetPart(TypedDict):
+    text: str
+    match: bool
+
+
+class SearchResult(TypedDict):
+    class_slug: str
+    date_str: str
+    entry_id: str
+    snippet: list[SnippetPart]
+
+
+def _connect() -> sqlite3.Connection:
+    """Returns this thread's connection to the entry index, creating it if needed."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(INDEX_PATH, timeout=30)
+        (version,) = conn.execute("PRAGMA user_version").fetchone()
+        needs_rebuild = version != SCHEMA_VERSION
+        if needs_rebuild:
+            conn.executescript(_DROP_SCHEMA)
+        conn.executescript(_SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        _local.conn = conn
+        if needs_rebuild:
+            logging.info(f"Entry index missing or outdated, building {INDEX_PATH}...")
+            rebuild_index()
+    return conn
+
+
+def _file_sizes(directory: Path) -> list[int]:
+    if not directory.is_dir():
+        return []
+    return [p.stat().st_size for p in directory.iterdir() if p.is_file()]
+
+
+def _read_first_line(path: Path) -> str:
+    try:
+        with path.open() as f:
+            for line in f:
+                if line.strip():
+                    return line.strip()[:NOTES_FIRST_LINE_LENGTH]
+    except FileNotFoundError:
+        pass
+    return ""
+
+
+def _size_or_zero(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def entry_ids_on_disk(class_slug: str, date_str: str) -> list[str]:
+    """Returns the IDs of a date's saved entries, oldest first."""
+    date_dir = DATA_DIR / class_slug / date_str
+    if not date_dir.is_dir():
+        return []
+    return sorted(
+        path.name
+        for path in date_dir.iterdir()
+        if path.is_dir() and ENTRY_ID_PATTERN.fullmatch(path.name)
+    )
+
+
+def summarize_entry(class_slug: str, date_str: str, entry_id: str) -> EntrySummary:
+    """Builds the compact listing record for an entry from what is on disk."""
+    entry_dir = DATA_DIR / class_slug / date_str / entry_id
+    image_sizes = _file_sizes(entry_dir / "images")
+    video_sizes = _file_sizes(entry_dir / "videos")
+    thumbnail = ""
+    images_dir = entry_dir / "images"
+    if image_sizes:
+        first_image = min(p for p in images_dir.iterdir() if p.is_file())
+        derivatives = media.get_image_derivatives(first_image, create=False)
+        if derivatives:
+            thumbnail = derivatives[min(derivatives)].relative_to(DATA_DIR).as_posix()
+    return {
+        "date_str": date_str,
+        "entry_count": 1,
+        "image_count": len(image_sizes),
+        "image_bytes": sum(image_sizes),
+        "video_count": len(video_sizes),
+        "video_bytes": sum(video_sizes),
+        "has_audio": media.find_audio(entry_dir) is not None,
+        "notes_length": _size_or_zero(entry_dir / "notes.txt"),
+        "transcript_length": _size_or_zero(entry_dir / "transcript.txt"),
+        "notes_first_line": _read_first_line(entry_dir / "notes.txt"),
+        "thumbnail": thumbnail,
+    }
+
+
+def _upsert(
+    conn: sqlite3.Connection, class_slug: str, entry_id: str, summary: EntrySummary
+) -> None:
+    columns = ["class_slug", "date_str", "entry_id", "updated_at", *_ENTRY_COLUMNS]
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns[3:])
+    conn.execute(
+        f"INSERT INTO entries ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT (class_slug, date_str, entry_id) DO UPDATE SET {updates}",
+        (
+            class_slug,
+            summary["date_str"],
+            entry_id,
+            time.time(),
+            *(summary[column] for column in _ENTRY_COLUMNS),
+        ),
+    )
+
+
+def _scan_data_dir() -> set[tuple[str, str, str]]:
+    """Walks the data directory and returns every (class_slug, date_str, entry_id)."""
+    found = set()
+    if not DATA_DIR.is_dir():
+        return found
+    for class_dir in DATA_DIR.iterdir():
+        if not class_dir.is_dir() or class_dir.name.startswith("."):
+            continue
+        for date_dir in class_dir.iterdir():
+            for entry_id in entry_ids_on_disk(class_dir.name, date_dir.name):
+                found.add((class_dir.name, date_dir.name, entry_id))
+    return found
+
+
+def legacy_dates() -> list[str]:
+    """Returns the dates whose files still sit directly in the date directory.
+
+    Dates saved before a date could hold several entries look like this, and stay
+    out of the index and gallery until `python -m app.storage migrate` moves their
+    files into an entry.
+    """
+    legacy = []
+    if not DATA_DIR.is_dir():
+        return legacy
+    for class_dir in DATA_DIR.iterdir():
+        if not class_dir.is_dir() or class_dir.name.startswith("."):
+            continue
+        for date_dir in class_dir.iterdir():
+            if date_dir.is_dir() and any(
+                not path.name.startswith(".")
+                and not ENTRY_ID_PATTERN.fullmatch(path.name)
+                for path in date_dir.iterdir()
+            ):
+                legacy.append(f"{class_dir.name}/{date_dir.name}")
+    return sorted(legacy)
+
+
+def _warn_about_legacy_dates() -> None:
+    if legacy := legacy_dates():
+        logging.warning(
+            f"{len(legacy)} date(s) use the old single-entry layout and are not "
+            f"indexed (e.g. {legacy[0]}); run `python -m app.storage migrate`."
+        )
+
+
+def _read_text(path: Path) -> str:
+    try:
+        return path.read_text()
+    except FileNotFoundError:
+        return ""
+
+
+def _index_text(
+    conn: sqlite3.Connection, class_slug: str, date_str: str, entry_id: str
+) -> None:
+    """Replaces an entry's notes and transcript in the full-text index."""
+    entry_dir = DATA_DIR / class_slug / date_str / entry_id
+    conn.execute(
+        "INSERT OR IGNORE INTO entry_docs (class_slug, date_str, entry_id) "
+        "VALUES (?, ?, ?)",
+        (class_slug, date_str, entry_id),
+    )
+    (doc_id,) = conn.execute(
+        "SELECT doc_id FROM entry_docs "
+        "WHERE class_slug = ? AND date_str = ? AND entry_id = ?",
+        (class_slug, date_str, entry_id),
+    ).fetchone()
+    conn.execute("DELETE FROM entry_text WHERE rowid = ?", (doc_id,))
+    conn.execute(
+        "INSERT INTO entry_text (rowid, notes, transcript) VALUES (?, ?, ?)",
+        (
+            doc_id,
+            _read_text(entry_dir / "notes.txt"),
+            _read_text(entry_dir / "transcript.txt"),
+        ),
+    )
+
+
+def record_entry(class_slug: str, date_str: str, entry_id: str) -> None:
+    """Adds or refreshes an entry, its summary and its text in a single transaction."""
+    summary = summarize_entry(class_slug, date_str, entry_id)
+    conn = _connect()
+    with conn:
+        _upsert(conn, class_slug, entry_id, summary)
+        _index_text(conn, class_slug, date_str, entry_id)
+
+
+def get_dates(
+    class_slug: str,
+    newest_first: bool = False,
+    offset: int = 0,
+    limit: int | None = None,
+) -> list[str]:
+    """Returns the indexed entry dates for a class, sorted by date.
+
+    `offset` and `limit` select a window of the sorted list.
+    """
+    order = "DESC" if newest_first else "ASC"
+    rows = _connect().execute(
+        "SELECT DISTINCT date_str FROM entries WHERE class_slug = ? "
+        f"ORDER BY date_str {order} LIMIT ? OFFSET ?",
+        (class_slug, -1 if limit is None else limit, offset),
+    )
+    return [row[0] for row in rows]
+
+
+def count_dates(class_slug: str) -> int:
+    """Returns how many entry dates a class has."""
+    (count,) = (
+        _connect()
+        .execute(
+            "SELECT COUNT(DISTINCT date_str) FROM entries WHERE class_slug = ?",
+            (class_slug,),
+        )
+        .fetchone()
+    )
+    return count
+
+
+def get_summaries(
+    class_slug: str, offset: int = 0, limit: int | None = None
+) -> list[EntrySummary]:
+    """Returns per-date summaries for a class, newest first, in one query."""
+    rows = _connect().execute(
+        f"{_DATE_SUMMARY_SELECT} WHERE class_slug = ? "
+        "GROUP BY date_str ORDER BY date_str DESC LIMIT ? OFFSET ?",
+        (class_slug, -1 if limit is None else limit, offset),
+    )
+    return [_row_to_summary(row) for row in rows]
+
+
+def get_summary(class_slug: str, date_str: str) -> EntrySummary | None:
+    row = (
+        _connect()
+        .execute(
+            f"{_DATE_SUMMARY_SELECT} WHERE class_slug = ? AND date_str = ? "
+            "GROUP BY date_str",
+            (class_slug, date_str),
+        )
+        .fetchone()
+    )
+    return _row_to_summary(row) if row else None
+
+
+def _row_to_summary(row: tuple) -> EntrySummary:
+    summary = dict(zip(_SUMMARY_COLUMNS, row))
+    summary["has_audio"] = bool(summary["has_audio"])
+    return summary
+
+
+def rebuild_index() -> int:
+    """Replaces the index contents with what is currently on disk."""
+    entries = _scan_data_dir()
+    summaries = [
+        (class_slug, entry_id, summarize_entry(class_slug, date_str, entry_id))
+        for class_slug, date_str, entry_id in entries
+    ]
+    conn = _connect()
+    with conn:
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM entry_docs")
+        conn.execute("DELETE FROM entry_text")
+        for class_slug, entry_id, summary in summaries:
+            _upsert(conn, class_slug, entry_id, summary)
+            _index_text(conn, class_slug, summary["date_str"], entry_id)
+    logging.info(f"Rebuilt entry index with {len(entries)} entries.")
+    _warn_about_legacy_dates()
+    return len(entries)
+
+
+def _fts_query(query: str) -> str:
+    """Turns free text into an FTS5 query that matches entries containing every word."""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+
+
+def _split_snippet(snippet: str) -> list[SnippetPart]:
+    parts: list[SnippetPart] = []
+    for i, text in enumerate(re.split(f"[{_MATCH_START}{_MATCH_END}]", snippet)):
+        if text:
+            parts.append({"text": text, "match": i % 2 == 1})
+    return parts
+
+
+def search(query: str, limit: int = 20) -> list[SearchResult]:
+    """Finds entries whose notes or transcript hold every word, best matches first."""
+    fts_query = _fts_query(query)
+    if not fts_query:
+        return []
+    rows = _connect().execute(
+        "SELECT d.class_slug, d.date_str, d.entry_id, "
+        f"snippet(entry_text, -1, ?, ?, '…', {SNIPPET_TOKENS}) "
+        "FROM entry_text JOIN entry_docs d ON d.doc_id = entry_text.rowid "
+        "WHERE entry_text MATCH ? ORDER BY bm25(entry_text) LIMIT ?",
+        (_MATCH_START, _MATCH_END, fts_query, limit),
+    )
+    return [
+        {
+            "class_slug": class_slug,
+            "date_str": date_str,
+            "entry_id": entry_id,
+            "snippet": _split_snippet(snippet),
+        }
+        for class_slug, date_str, entry_id, snippet in rows
+    ]
+
+
+def date_position(class_slug: str, date_str: str) -> int:
+    """Returns a date's position in the class's newest-first date list, or -1."""
+    conn = _connect()
+    exists = conn.execute(
+        "SELECT 1 FROM entries WHERE class_slug = ? AND date_str = ?",
+        (class_slug, date_str),
+    ).fetchone()
+    if not exists:
+        return -1
+    (position,) = conn.execute(
+        "SELECT COUNT(DISTINCT date_str) FROM entries "
+        "WHERE class_slug = ? AND date_str > ?",
+        (class_slug, date_str),
+    ).fetchone()
+    return position
+
+
+def verify_index() -> tuple[set[tuple[str, str, str]], set[tuple[str, str, str]]]:
+    """Compares the index with the disk, returning (missing, stale) entries."""
+    on_disk = _scan_data_dir()
+    indexed = set(
+        _connect().execute("SELECT class_slug, date_str, entry_id FROM entries")
+    )
+    return on_disk - indexed, indexed - on_disk
+
+
+def main(argv: list[str]) -> int:
+    command = argv[0] if argv else ""
+    if command == "rebuild":
+        print(f"Indexed {rebuild_index()} entries in {INDEX_PATH}.")
+        return 0
+    if command == "verify":
+        missing, stale = verify_index()
+        for class_slug, date_str, entry_id in sorted(missing):
+            print(f"missing from index: {class_slug}/{date_str}/{entry_id}")
+        for class_slug, date_str, entry_id in sorted(stale):
+            print(f"stale in index: {class_slug}/{date_str}/{entry_id}")
+        legacy = legacy_dates()
+        for date in legacy:
+            print(f"old single-entry layout: {date}")
+        if legacy:
+            print("Run `python -m app.storage migrate` to index those dates.")
+        if missing or stale:
+            print("Index is out of date; run `python -m app.index rebuild`.")
+        if missing or stale or legacy:
+            return 1
+        print("Index is up to date.")
+        return 0
+    print("usage: python -m app.index {rebuild|verify}")
+    return 2
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,329 @@
+import glob
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TypedDict
+from urllib.parse import quote
+from PIL import Image, ImageOps
+from reflex.config import get_config
+from app import blobs
+from app.config import (
+    AUDIO_BITRATE,
+    DATA_DIR,
+    KEEP_ORIGINAL_AUDIO,
+    VIDEO_MAX_BITRATE,
+    VIDEO_MAX_WIDTH,
+    VIDEO_WORKERS,
+)
+
+try:
+    import pillow_heif
+
+    pillow_heif.register_heif_opener()
+except ImportError:
+    pillow_heif = None
+
+MEDIA_ROUTE = "/media"
+DERIVATIVES_DIRNAME = "derivatives"
+IMAGE_WIDTHS = [320, 640, 1280]
+DISPLAY_WIDTH = 640
+WEBP_QUALITY = 80
+POSTER_OFFSET_SECONDS = 1
+FFMPEG = shutil.which("ffmpeg")
+AUDIO_DIRNAME = "audio"
+AUDIO_STEM = "recording"
+ORIGINAL_AUDIO_STEM = "original"
+COMPRESSED_AUDIO_SUFFIX = ".ogg"
+# Browsers record WebM, Ogg or MP4 depending on the vendor; older entries hold WAV.
+AUDIO_MIME_TYPES = {
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".webm": "audio/webm",
+    ".m4a": "audio/mp4",
+    ".mp4": "audio/mp4",
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+}
+
+
+class ImageVariant(TypedDict):
+    src: str
+    srcset: str
+    original: str
+
+
+class VideoVariant(TypedDict):
+    src: str
+    poster: str
+    original: str
+
+
+def media_url(path: Path) -> str:
+    """Returns the URL the browser should use to fetch a file stored under DATA_DIR."""
+    relative = path.relative_to(DATA_DIR).as_posix()
+    return f"{get_config().api_url}{MEDIA_ROUTE}/{quote(relative)}"
+
+
+def _fingerprint(source: Path) -> str:
+    """Identifies a source file's current contents by name, size and mtime."""
+    stat = source.stat()
+    key = f"{source.name}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def _derivative_path(source: Path, fingerprint: str, width: int) -> Path:
+    entry_dir = source.parent.parent
+    return (
+        entry_dir / DERIVATIVES_DIRNAME / f"{source.stem}-{fingerprint}-{width}w.webp"
+    )
+
+
+def get_image_derivatives(image_path: Path, create: bool = True) -> dict[int, Path]:
+    """Returns WebP renditions of an image keyed by width, generating missing ones.
+
+    Renditions are never wider than the original. An empty dict means the image could
+    not be decoded (e.g. HEIC without pillow-heif installed), or that none exist yet
+    when `create` is False.
+    """
+    try:
+        fingerprint = _fingerprint(image_path)
+        derivatives_dir = _derivative_path(image_path, fingerprint, 0).parent
+        existing = {
+            int(path.stem.rsplit("-", 1)[1].removesuffix("w")): path
+            for path in derivatives_dir.glob(
+                f"{glob.escape(image_path.stem)}-{fingerprint}-*w.webp"
+            )
+        }
+        if existing or not create:
+            return existing
+        return _generate_image_derivatives(image_path, fingerprint)
+    except Exception as e:
+        logging.exception(f"Could not create derivatives for {image_path}: {e}")
+        return {}
+
+
+def _generate_image_derivatives(image_path: Path, fingerprint: str) -> dict[int, Path]:
+    with Image.open(image_path) as opened:
+        image = ImageOps.exif_transpose(opened).convert("RGB")
+    widths = [width for width in IMAGE_WIDTHS if width < image.width] or [image.width]
+    derivatives = {}
+    for width in sorted(widths, reverse=True):
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+        path = _derivative_path(image_path, fingerprint, width)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        image.save(tmp_path, "WEBP", quality=WEBP_QUALITY)
+        tmp_path.replace(path)
+        derivatives[width] = path
+    logging.info(f"Created {len(derivatives)} derivatives for {image_path}")
+    return derivatives
+
+
+def image_variant(image_path: Path) -> ImageVariant:
+    """Describes an image for responsive display: a default src plus a srcset."""
+    original = media_url(image_path)
+    derivatives = get_image_derivatives(image_path)
+    if not derivatives:
+        return {"src": original, "srcset": "", "original": original}
+    display_width = min(derivatives, key=lambda width: abs(width - DISPLAY_WIDTH))
+    if image_path.suffix.lower() == ".heic":
+        # Browsers can't show HEIC, so link the largest WebP rendition instead.
+        original = media_url(derivatives[max(derivatives)])
+    return {
+        "src": media_url(derivatives[display_width]),
+        "srcset": ", ".join(
+            f"{media_url(path)} {width}w" for width, path in sorted(derivatives.items())
+        ),
+        "original": original,
+    }
+
+
+_video_executor: ProcessPoolExecutor | None = None
+_video_lock = threading.Lock()
+_videos_in_progress: set[Path] = set()
+
+
+def _video_derivative_paths(video_path: Path) -> tuple[Path, Path]:
+    """Returns the (poster, web rendition) paths for a video's current contents."""
+    fingerprint = _fingerprint(video_path)
+    derivatives_dir = video_path.parent.parent / DERIVATIVES_DIRNAME
+    return (
+        derivatives_dir / f"{video_path.stem}-{fingerprint}-poster.jpg",
+        derivatives_dir / f"{video_path.stem}-{fingerprint}-web.mp4",
+    )
+
+
+def _run_ffmpeg(*args: str) -> None:
+    subprocess.run(
+        [FFMPEG, "-hide_banner", "-loglevel", "error", "-y", *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+def process_video(video_path: Path) -> bool:
+    """Extracts a poster frame and encodes a capped-bitrate faststart MP4 rendition."""
+    poster_path, rendition_path = _video_derivative_paths(video_path)
+    poster_path.parent.mkdir(exist_ok=True)
+    scale = f"scale='min({VIDEO_MAX_WIDTH},iw)':-2"
+    try:
+        if not poster_path.exists():
+            tmp_poster = poster_path.with_name(f".{poster_path.name}")
+            _run_ffmpeg(
+                "-ss", str(POSTER_OFFSET_SECONDS), "-i", str(video_path),
+                "-frames:v", "1", "-vf", scale, "-f", "image2", str(tmp_poster),
+            )  # fmt: skip
+            tmp_poster.replace(poster_path)
+        if not rendition_path.exists():
+            tmp_rendition = rendition_path.with_name(f".{rendition_path.name}")
+            _run_ffmpeg(
+                "-i", str(video_path), "-vf", scale,
+                "-c:v", "libx264", "-preset", "veryfast",
+                "-b:v", VIDEO_MAX_BITRATE, "-maxrate", VIDEO_MAX_BITRATE,
+                "-bufsize", VIDEO_MAX_BITRATE,
+                "-c:a", "aac", "-b:a", "128k",
+                "-movflags", "+faststart", "-f", "mp4", str(tmp_rendition),
+            )  # fmt: skip
+            tmp_rendition.replace(rendition_path)
+        # Bump the entry's version so cached gallery data picks up the new files.
+        os.utime(video_path.parent.parent)
+        logging.info(f"Processed video {video_path}")
+        return True
+    except subprocess.CalledProcessError as e:
+        logging.error(
+            f"ffmpeg failed for {video_path}: {e.stderr.decode(errors='replace')}"
+        )
+        return False
+    except OSError as e:
+        logging.error(f"Could not process video {video_path}: {e}")
+        return False
+
+
+def _video_done(video_path: Path) -> None:
+    with _video_lock:
+        _videos_in_progress.discard(video_path)
+
+
+def schedule_video_processing(video_paths: list[Path]) -> None:
+    """Queues videos for poster and rendition generation in a background pool."""
+    global _video_executor
+    if FFMPEG is None:
+        logging.warning("ffmpeg not found; videos will be served as uploaded.")
+        return
+    with _video_lock:
+        if _video_executor is None:
+            _video_executor = ProcessPoolExecutor(
+                max_workers=VIDEO_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        for video_path in video_paths:
+            if video_path in _videos_in_progress:
+                continue
+            _videos_in_progress.add(video_path)
+            future = _video_executor.submit(process_video, video_path)
+            future.add_done_callback(lambda _, path=video_path: _video_done(path))
+
+
+def video_variant(video_path: Path) -> VideoVariant:
+    """Describes a video for display, preferring the web rendition and poster."""
+    original = media_url(video_path)
+    try:
+        poster_path, rendition_path = _video_derivative_paths(video_path)
+    except OSError as e:
+        logging.warning(f"Could not stat video {video_path}: {e}")
+        return {"src": original, "poster": "", "original": original}
+    if not rendition_path.exists():
+        schedule_video_processing([video_path])
+    return {
+        "src": media_url(rendition_path) if rendition_path.exists() else original,
+        "poster": media_url(poster_path) if poster_path.exists() else "",
+        "original": original,
+    }
+
+
+def find_audio(entry_dir: Path) -> Path | None:
+    """Returns an entry's playable recording, preferring the compressed one."""
+    audio_dir = entry_dir / AUDIO_DIRNAME
+    if not audio_dir.is_dir():
+        return None
+    # Entries saved before audio was compressed may hold an empty placeholder.
+    recordings = sorted(
+        path
+        for path in audio_dir.glob(f"{AUDIO_STEM}.*")
+        if path.is_file() and path.stat().st_size > 0
+    )
+    for path in recordings:
+        if path.suffix == COMPRESSED_AUDIO_SUFFIX:
+            return path
+    return recordings[0] if recordings else None
+
+
+def audio_mime_type(audio_path: Path) -> str:
+    return AUDIO_MIME_TYPES.get(audio_path.suffix.lower(), "")
+
+
+def media_type(path: Path) -> str | None:
+    """Returns the Content-Type to serve a stored file with, or None to guess."""
+    if path.parent.name == AUDIO_DIRNAME:
+        return audio_mime_type(path) or None
+    return None
+
+
+def encode_audio(source: Path, dest: Path) -> bool:
+    """Encodes a recording as mono Opus in an Ogg container."""
+    tmp_dest = dest.with_name(f".{dest.name}")
+    try:
+        _run_ffmpeg(
+            "-i", str(source), "-vn", "-ac", "1",
+            "-c:a", "libopus", "-b:a", AUDIO_BITRATE, "-application", "voip",
+            "-f", "ogg", str(tmp_dest),
+        )  # fmt: skip
+        tmp_dest.replace(dest)
+        return True
+    except subprocess.CalledProcessError as e:
+        logging.error(
+            f"ffmpeg failed for {source}: {e.stderr.decode(errors='replace')}"
+        )
+    except OSError as e:
+        logging.error(f"Could not encode audio {source}: {e}")
+    tmp_dest.unlink(missing_ok=True)
+    return False
+
+
+def store_audio(source: Path, entry_dir: Path) -> Path:
+    """Stores a recording in an entry, replacing any previous one.
+
+    With ffmpeg available the recording is stored as Opus, a small fraction of the
+    size of the browser's upload, and the upload itself is kept only when
+    KEEP_ORIGINAL_AUDIO is set. Without ffmpeg it is stored as uploaded. The source
+    is left in place for the caller to delete once the entry is saved.
+    """
+    audio_dir = entry_dir / AUDIO_DIRNAME
+    remove_audio(entry_dir)
+    audio_dir.mkdir(exist_ok=True)
+    suffix = source.suffix.lower() or ".webm"
+    compressed = audio_dir / f"{AUDIO_STEM}{COMPRESSED_AUDIO_SUFFIX}"
+    if FFMPEG is not None and encode_audio(source, compressed):
+        if KEEP_ORIGINAL_AUDIO:
+            blobs.link_or_copy(source, audio_dir / f"{ORIGINAL_AUDIO_STEM}{suffix}")
+        logging.info(
+            f"Compressed {source.name} to {compressed.stat().st_size} bytes of Opus"
+        )
+        return compressed
+    if FFMPEG is None:
+        logging.warning("ffmpeg not found; audio will be stored as uploaded.")
+    dest = audio_dir / f"{AUDIO_STEM}{suffix}"
+    blobs.link_or_copy(source, dest)
+    return dest
+
+
+def remove_audio(entry_dir: Path) -> None:
+    """Deletes an entry's recording and any retained original."""
+    shutil.rmtree(entry_dir / AUDIO_DIRNAME, ignore_errors=True)
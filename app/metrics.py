@@ -0,0 +1,274 @@
+import bisect
+import functools
+import inspect
+import threading
+import time
+from typing import Callable
+from reflex.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from app.config import METRICS_ALLOWED_HOSTS, METRICS_ENABLED
+
+# Metrics are off unless ARTIFACTMAKER_METRICS=1. When off, `timed` hands back the
+# undecorated function, the event middleware and endpoint are never registered,
+# and every other call returns after checking one module-level flag.
+ENABLED = METRICS_ENABLED
+METRICS_ROUTE = "/metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+# 1 KiB to 4 GiB in steps of 4x.
+BYTES_BUCKETS = tuple(float(4**n * 1024) for n in range(12))
+AUDIO_SECONDS_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 600.0, 1800.0, 3600.0)
+DEPTH_BUCKETS = (0.0, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+# Events still waiting for their final update; a bound in case one never gets it.
+MAX_TRACKED_EVENTS = 10000
+
+_lock = threading.Lock()
+_registry: dict[str, "_Metric"] = {}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], list[float]] = {}
+        _registry[name] = self
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...], extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _samples(self) -> list[str]:
+        return []
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with _lock:
+            self._values.setdefault(key, [0.0])[0] += amount
+
+    def _samples(self) -> list[str]:
+        with _lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._labels(key)} {value[0]}" for key, value in values]
+
+
+class Histogram(_Metric):
+    """Counts observations into fixed buckets; values are [bucket counts..., sum]."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            counts[slot] += 1
+            counts[-1] += value
+
+    def _samples(self) -> list[str]:
+        with _lock:
+            values = [(key, list(counts)) for key, counts in self._values.items()]
+        lines = []
+        for key, counts in sorted(values):
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{self._labels(key, le)} {cumulative:g}"
+                )
+            lines.append(f"{self.name}_sum{self._labels(key)} {counts[-1]}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative:g}")
+        return lines
+
+
+class Gauge(_Metric):
+    """A value read from `read` whenever metrics are scraped."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        super().__init__(name, help)
+        self.read = read
+
+    def _samples(self) -> list[str]:
+        # Read without holding the metrics lock, since `read` may take its own.
+        return [f"{self.name} {float(self.read())}"]
+
+
+def timed(histogram: Histogram, **labels) -> Callable:
+    """Decorates a function or coroutine function to observe its duration."""
+
+    def decorator(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started, **labels)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, **labels)
+
+        return wrapper
+
+    return decorator
+
+
+def render() -> str:
+    """Returns every registered metric in the Prometheus text format."""
+    lines = []
+    for metric in list(_registry.values()):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def drain() -> dict[str, dict[tuple[str, ...], list[float]]]:
+    """Takes the counter and histogram values recorded so far, resetting them.
+
+    Worker processes send these to the parent, which adds them with `merge`.
+    """
+    drained = {}
+    with _lock:
+        for name, metric in _registry.items():
+            if isinstance(metric, (Counter, Histogram)) and metric._values:
+                drained[name] = metric._values
+                metric._values = {}
+    return drained
+
+
+def merge(drained: dict[str, dict[tuple[str, ...], list[float]]]) -> None:
+    """Adds values drained from another process into this one's metrics."""
+    with _lock:
+        for name, values in drained.items():
+            metric = _registry.get(name)
+            if metric is None:
+                continue
+            for key, incoming in values.items():
+                current = metric._values.get(key)
+                if current is None:
+                    metric._values[key] = list(incoming)
+                else:
+                    for i, value in enumerate(incoming):
+                        current[i] += value
+
+
+async def serve_metrics(request: Request) -> Response:
+    """Serves the metrics to scrapers on the allowed hosts (loopback by default)."""
+    if request.client is None or request.client.host not in METRICS_ALLOWED_HOSTS:
+        return Response(status_code=403)
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
+
+
+EVENT_SECONDS = Histogram(
+    "artifactmaker_event_seconds",
+    "Time from an event reaching the backend to its final state update.",
+    ("handler",),
+)
+STATE_UPDATE_BYTES = Histogram(
+    "artifactmaker_state_update_bytes",
+    "Serialized size of the state updates sent to the browser.",
+    ("handler",),
+    BYTES_BUCKETS,
+)
+
+
+def _handler_label(event_name: str) -> str:
+    # "reflex___state____state.app___states___gallery_state____gallery_state.on_load"
+    # becomes "gallery_state.on_load".
+    state_name, _, handler = event_name.rpartition(".")
+    return f"{state_name.rpartition('.')[2].rpartition('____')[2]}.{handler}"
+
+
+class EventMetricsMiddleware(Middleware):
+    """Times every event handler and measures the state updates it sends."""
+
+    def __init__(self):
+        self._started: dict[int, float] = {}
+
+    async def preprocess(self, app, state, event):
+        self._started[id(event)] = time.perf_counter()
+        while len(self._started) > MAX_TRACKED_EVENTS:
+            self._started.pop(next(iter(self._started)))
+        return None
+
+    async def postprocess(self, app, state, event, update):
+        handler = _handler_label(event.name)
+        STATE_UPDATE_BYTES.observe(len(update.json()), handler=handler)
+        if update.final:
+            started = self._started.pop(id(event), None)
+            if started is not None:
+                EVENT_SECONDS.observe(time.perf_counter() - started, handler=handler)
+        return update
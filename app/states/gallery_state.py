@@ -1,29 +1,147 @@
 import reflex as rx
-from typing import Any, TypedDict
+from typing import TypedDict
+import datetime
 import logging
-from app import classes, utils, storage
+from app import async_storage, classes, entry_cache, media, metrics, utils, storage
+from app.config import (
+    DATA_DIR,
+    ENTRY_CACHE_SIZE,
+    GALLERY_PAGE_SIZE,
+    GALLERY_PREFETCH_NEIGHBORS,
+)
+
+
+class SegmentLine(TypedDict):
+    start: float
+    label: str
+    text: str
 
 
 class EntryData(TypedDict, total=False):
-    images: list[str]
-    videos: list[str]
+    id: str
+    saved_at: str
+    image_variants: list[media.ImageVariant]
+    video_variants: list[media.VideoVariant]
     audio_path: str | None
+    audio_type: str
     typed_text: str
     transcript: str
+    has_segments: bool
+    # Filled in when the timestamped transcript is first shown.
+    segments: list[SegmentLine]
+    show_timestamps: bool
 
 
-class GalleryState(rx.State):
-    selected_class_slug: str = ""
-    available_dates: list[str] = []
-    current_date_index: int = -1
-    current_entry: EntryData = {
-        "images": [],
-        "videos": [],
+class DateItem(TypedDict):
+    date: str
+    description: str
+    notes_preview: str
+    thumbnail: str
+
+
+class DateGroup(TypedDict):
+    label: str
+    dates: list[DateItem]
+
+
+def _month_label(date_str: str) -> str:
+    try:
+        return datetime.date.fromisoformat(date_str).strftime("%B %Y")
+    except ValueError:
+        return "Other"
+
+
+def _empty_entry() -> EntryData:
+    return {
+        "id": "",
+        "saved_at": "",
+        "image_variants": [],
+        "video_variants": [],
         "audio_path": None,
+        "audio_type": "",
         "typed_text": "",
         "transcript": "",
+        "has_segments": False,
+        "segments": [],
+        "show_timestamps": False,
     }
 
+
+def _timestamp_label(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def _process_entry_data(entry_data) -> EntryData:
+    processed = _empty_entry()
+    for key, value in entry_data.items():
+        if key in ("images", "videos"):
+            # Sent only as image_variants and video_variants below.
+            continue
+        if hasattr(value, "as_posix"):
+            processed[key] = media.media_url(value) if value else None
+        else:
+            processed[key] = value
+    processed["image_variants"] = [
+        media.image_variant(image) for image in entry_data.get("images", [])
+    ]
+    processed["video_variants"] = [
+        media.video_variant(video) for video in entry_data.get("videos", [])
+    ]
+    saved_at = storage.entry_saved_at(processed["id"])
+    processed["saved_at"] = saved_at.strftime("%H:%M") if saved_at else ""
+    return processed
+
+
+_entry_cache = entry_cache.LRUCache(ENTRY_CACHE_SIZE)
+
+ENTRY_CACHE_LOOKUPS = metrics.Counter(
+    "artifactmaker_entry_cache_lookups_total",
+    "Gallery entry cache lookups, by whether they hit.",
+    ("result",),
+)
+ENTRY_CACHE_ENTRIES = metrics.Gauge(
+    "artifactmaker_entry_cache_entries",
+    "Dates whose processed entries are held in the gallery entry cache.",
+    lambda: entry_cache_stats()["size"],
+)
+
+
+def load_processed_entries(class_slug: str, date_str: str) -> list[EntryData]:
+    """Returns a date's gallery-ready entries, served from the LRU cache when unchanged.
+
+    Cached lists are shared, so callers replace entries rather than mutate them.
+    """
+    key = (class_slug, date_str, storage.get_entry_version(class_slug, date_str))
+    cached = _entry_cache.get(key)
+    ENTRY_CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+    if cached is not None:
+        return cached
+    processed = [
+        _process_entry_data(entry)
+        for entry in storage.load_entries(class_slug, date_str)
+    ]
+    _entry_cache.put(key, processed)
+    return processed
+
+
+def entry_cache_stats() -> dict[str, float]:
+    return _entry_cache.stats()
+
+
+class GalleryState(rx.State):
+    selected_class_slug: str = ""
+    requested_date: str = ""
+    # Only a window of the class's dates is held in state, so the payload
+    # stays the same size however many entries a class accumulates.
+    date_window: list[str] = []
+    window_summaries: list[DateItem] = []
+    window_offset: int = 0
+    total_dates: int = 0
+    current_date_index: int = -1
+    current_entries: list[EntryData] = []
+    prefetch_urls: list[str] = []
+
     @rx.event
     def on_load(self):
         slug = self.router.page.params.get("class", list(classes.CLASS_INFO.keys())[0])
@@ -31,65 +149,147 @@ class GalleryState(rx.State):
             self.selected_class_slug = slug
         else:
             self.selected_class_slug = list(classes.CLASS_INFO.keys())[0]
+        self.requested_date = self.router.page.params.get("date", "")
         logging.info(f"Gallery on_load triggered for class: {self.selected_class_slug}")
         return GalleryState.load_dates_for_class
 
     @rx.event(background=True)
     async def load_dates_for_class(self):
         async with self:
-            self.available_dates = sorted(
-                utils.get_all_dates_for_class(self.selected_class_slug), reverse=True
+            class_slug = self.selected_class_slug
+            requested_date = self.requested_date
+        total_dates = await async_storage.count_dates_for_class(class_slug)
+        index = 0
+        if requested_date:
+            index = max(
+                0, await async_storage.get_date_position(class_slug, requested_date)
             )
-            if self.available_dates:
-                self.current_date_index = 0
-            else:
-                self.current_date_index = -1
+        async with self:
+            if self.selected_class_slug != class_slug:
+                return
+            self.total_dates = total_dates
+            self.current_date_index = index if total_dates else -1
+            await self._load_window(index)
         if self.current_date_index != -1:
             yield GalleryState.load_entry_for_date
 
+    async def _load_window(self, offset: int):
+        offset = max(0, min(offset, self.total_dates - 1))
+        self.window_offset = offset - offset % GALLERY_PAGE_SIZE
+        summaries = await async_storage.get_entry_summaries(
+            self.selected_class_slug, self.window_offset, GALLERY_PAGE_SIZE
+        )
+        self.date_window = [summary["date_str"] for summary in summaries]
+        self.window_summaries = [
+            {
+                "date": summary["date_str"],
+                "description": utils.describe_entry(summary) or "Empty entry",
+                "notes_preview": summary["notes_first_line"],
+                "thumbnail": (
+                    media.media_url(DATA_DIR / summary["thumbnail"])
+                    if summary["thumbnail"]
+                    else ""
+                ),
+            }
+            for summary in summaries
+        ]
+
+    async def _select_index(self, index: int):
+        self.current_date_index = index
+        if not (
+            self.window_offset <= index < self.window_offset + len(self.date_window)
+        ):
+            await self._load_window(index)
+        return GalleryState.load_entry_for_date
+
     @rx.event
     async def load_entry_for_date(self):
-        if self.current_date_index < 0 or self.current_date_index >= len(
-            self.available_dates
-        ):
-            self.current_entry = {
-                "images": [],
-                "videos": [],
-                "audio_path": None,
-                "typed_text": "",
-                "transcript": "",
-            }
+        if not self.current_date:
+            self.current_entries = []
             return
-        date_str = self.available_dates[self.current_date_index]
-        entry_data = storage.load_entry(self.selected_class_slug, date_str)
-        self.current_entry = self._process_entry_data(entry_data)
-
-    def _process_entry_data(self, entry_data):
-        if not entry_data:
-            return {
-                "images": [],
-                "videos": [],
-                "audio_path": None,
-                "typed_text": "",
-                "transcript": "",
-            }
-        processed: EntryData = {
-            "images": [],
-            "videos": [],
-            "audio_path": None,
-            "typed_text": "",
-            "transcript": "",
-        }
-        for key, value in entry_data.items():
-            if isinstance(value, list) and value and hasattr(value[0], "as_posix"):
-                processed[key] = [p.as_posix().replace("data/", "") for p in value]
-            elif hasattr(value, "as_posix"):
-                processed[key] = (
-                    value.as_posix().replace("data/", "") if value else None
+        self.current_entries = await async_storage.read(
+            load_processed_entries, self.selected_class_slug, self.current_date
+        )
+        return GalleryState.prefetch_neighbors
+
+    @rx.event(background=True)
+    async def prefetch_neighbors(self):
+        """Warms the entry cache around the current date and preloads its thumbnails."""
+        async with self:
+            class_slug = self.selected_class_slug
+            index = self.current_date_index
+        lo = max(0, index - GALLERY_PREFETCH_NEIGHBORS)
+        window = await async_storage.get_date_window(
+            class_slug, lo, 2 * GALLERY_PREFETCH_NEIGHBORS + 1
+        )
+        neighbors = [
+            date_str for i, date_str in enumerate(window, start=lo) if i != index
+        ]
+        urls = []
+        for date_str in neighbors:
+            entries = await async_storage.read(
+                load_processed_entries, class_slug, date_str
+            )
+            for entry in entries:
+                urls.extend(variant["src"] for variant in entry["image_variants"])
+                urls.extend(
+                    variant["poster"]
+                    for variant in entry["video_variants"]
+                    if variant["poster"]
+                )
+        async with self:
+            if self.current_date_index == index:
+                self.prefetch_urls = urls
+
+    def _update_entry(self, entry_id: str, **changes):
+        """Replaces one of the current entries with an updated copy."""
+        for position, entry in enumerate(self.current_entries):
+            if entry["id"] == entry_id:
+                self.current_entries = [
+                    *self.current_entries[:position],
+                    {**entry, **changes},
+                    *self.current_entries[position + 1 :],
+                ]
+                return
+
+    @rx.event(background=True)
+    async def toggle_timestamps(self, entry_id: str):
+        """Shows an entry's transcript as timestamped lines, loaded on first use."""
+        async with self:
+            entry = next((e for e in self.current_entries if e["id"] == entry_id), None)
+            if entry is None:
+                return
+            if entry["show_timestamps"] or entry["segments"]:
+                self._update_entry(
+                    entry_id, show_timestamps=not entry["show_timestamps"]
+                )
+                return
+            class_slug = self.selected_class_slug
+            date_str = self.current_date
+        segments = await async_storage.load_segments(class_slug, date_str, entry_id)
+        async with self:
+            if self.current_date == date_str:
+                self._update_entry(
+                    entry_id,
+                    show_timestamps=True,
+                    segments=[
+                        {
+                            "start": segment["start"],
+                            "label": _timestamp_label(segment["start"]),
+                            "text": segment["text"],
+                        }
+                        for segment in segments
+                    ],
                 )
-            else:
-                processed[key] = value
-        return processed
+
+    @rx.event
+    def seek_audio(self, entry_id: str, start: float):
+        if not storage.is_entry_id(entry_id):
+            return
+        return rx.call_script(
+            f"const audio = document.getElementById('entry-audio-{entry_id}');"
+            f" if (audio) {{ audio.currentTime = {float(start)}; audio.play(); }}"
+        )
 
     @rx.var
     def selected_class_info(self) -> classes.ClassInfo:
@@ -103,34 +303,68 @@ class GalleryState(rx.State):
 
     @rx.var
     def has_entries(self) -> bool:
-        return len(self.available_dates) > 0
-
-    @rx.var
-    def total_dates(self) -> int:
-        return len(self.available_dates)
+        return self.total_dates > 0
 
     @rx.var
     def current_date(self) -> str:
-        if 0 <= self.current_date_index < len(self.available_dates):
-            return self.available_dates[self.current_date_index]
+        position = self.current_date_index - self.window_offset
+        if 0 <= position < len(self.date_window):
+            return self.date_window[position]
         return ""
 
+    @rx.var
+    def date_groups(self) -> list[DateGroup]:
+        groups: list[DateGroup] = []
+        for item in self.window_summaries:
+            label = _month_label(item["date"])
+            if not groups or groups[-1]["label"] != label:
+                groups.append({"label": label, "dates": []})
+            groups[-1]["dates"].append(item)
+        return groups
+
+    @rx.var
+    def has_newer_page(self) -> bool:
+        return self.window_offset > 0
+
+    @rx.var
+    def has_older_page(self) -> bool:
+        return self.window_offset + len(self.date_window) < self.total_dates
+
+    @rx.var
+    def window_label(self) -> str:
+        if not self.date_window:
+            return ""
+        first = self.window_offset + 1
+        last = self.window_offset + len(self.date_window)
+        return f"{first}-{last} of {self.total_dates}"
+
     @rx.event
-    def set_current_date(self, date_str: str):
+    async def set_current_date(self, date_str: str):
         try:
-            self.current_date_index = self.available_dates.index(date_str)
-            return GalleryState.load_entry_for_date
+            position = self.date_window.index(date_str)
         except ValueError as e:
-            logging.exception(f"Date {date_str} not found in available dates: {e}")
+            logging.exception(f"Date {date_str} not found in the visible dates: {e}")
+            return
+        return await self._select_index(self.window_offset + position)
 
     @rx.event
-    def next_date(self):
-        if self.current_date_index < len(self.available_dates) - 1:
-            self.current_date_index += 1
-            return GalleryState.load_entry_for_date
+    async def next_date(self):
+        if self.current_date_index < self.total_dates - 1:
+            return await self._select_index(self.current_date_index + 1)
 
     @rx.event
-    def prev_date(self):
+    async def prev_date(self):
         if self.current_date_index > 0:
-            self.current_date_index -= 1
-            return GalleryState.load_entry_for_date
\ No newline at end of file
+            return await self._select_index(self.current_date_index - 1)
+
+    @rx.event
+    async def newer_page(self):
+        """Shows the previous page of dates and selects its first date."""
+        if self.has_newer_page:
+            return await self._select_index(self.window_offset - GALLERY_PAGE_SIZE)
+
+    @rx.event
+    async def older_page(self):
+        """Shows the next page of dates and selects its first date."""
+        if self.has_older_page:
+            return await self._select_index(self.window_offset + GALLERY_PAGE_SIZE)
@@ -1,22 +1,121 @@
 import reflex as rx
-from typing import Literal
+from typing import Literal, TypedDict
+import asyncio
 import datetime
-from app import classes, storage, transcription
+import hashlib
+import time
+import uuid
+from app import (
+    async_storage,
+    classes,
+    transcription,
+    transcription_jobs,
+    uploads,
+)
+from app.config import LIVE_CHUNK_SECONDS
 import logging
+import shutil
 from pathlib import Path
 
+JOB_POLL_INTERVAL = 0.5
+MAX_VIDEO_FILES = 2
+UPLOAD_COPY_CHUNK_SIZE = 1024 * 1024
+UPLOAD_STALL_SECONDS = 30
+RECORDING_EXTENSIONS = ("webm", "ogg", "m4a")
+
+
+class VideoUpload(TypedDict):
+    id: str
+    filename: str
+    size: int
+    received_bytes: int
+    percent: int
+    status: Literal["uploading", "stalled", "complete", "failed"]
+
+
+def _tracked_upload(item: dict, previous: VideoUpload | None) -> VideoUpload:
+    """Starts (or restarts) tracking an upload the browser reported as running."""
+    if previous is not None:
+        if previous["status"] == "complete":
+            return previous
+        return {**previous, "status": "uploading"}
+    return {
+        "id": item["id"],
+        "filename": item["filename"],
+        "size": item["size"],
+        "received_bytes": 0,
+        "percent": 0,
+        "status": "uploading",
+    }
+
+
+def _stage_upload(file: rx.UploadFile) -> tuple[str, str]:
+    """Streams an upload into its own directory under the upload dir.
+
+    Returns the staged path relative to the upload dir and the file's SHA-256,
+    computed as it is copied so the blob store needn't read it again. Each upload
+    gets a fresh directory, so teachers who pick files with the same name never
+    overwrite each other's, while the file itself keeps the name it is saved under.
+    """
+    staged = Path(uuid.uuid4().hex) / Path(file.name).name
+    path = rx.get_upload_dir() / staged
+    path.parent.mkdir(parents=True)
+    digest = hashlib.sha256()
+    with path.open("wb") as f:
+        while chunk := file.file.read(UPLOAD_COPY_CHUNK_SIZE):
+            digest.update(chunk)
+            f.write(chunk)
+    return staged.as_posix(), digest.hexdigest()
+
+
+def _discard_staged(staged: list[str]) -> None:
+    """Removes staged uploads, along with the directories _stage_upload made."""
+    upload_dir = rx.get_upload_dir()
+    for name in staged:
+        shutil.rmtree(upload_dir / Path(name).parts[0], ignore_errors=True)
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _stage_recording(recording_id: str, extension: str) -> str:
+    """Moves a finished recording into the upload dir and returns its name there."""
+    name = f"recording-{recording_id}.{extension}"
+    upload_dir = rx.get_upload_dir()
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    shutil.move(uploads.live_audio_path(recording_id), upload_dir / name)
+    uploads.discard(recording_id)
+    return name
+
 
 class RecorderState(rx.State):
     selected_class_slug: str = list(classes.CLASS_INFO.keys())[0]
     entry_date: str = datetime.date.today().isoformat()
     typed_text: str = ""
     image_files: list[str] = []
-    video_files: list[str] = []
+    # SHA-256 of each staged image, keyed by its entry in image_files.
+    _image_digests: dict[str, str] = {}
+    video_uploads: list[VideoUpload] = []
+    # Bumped whenever a new tracking loop starts, so an older one can bow out.
+    _upload_tracker: int = 0
     audio_file: str | None = None
     recording_status: Literal[
         "idle", "recording", "processing", "error", "unsupported", "permission_denied"
     ] = "idle"
     transcript: str = ""
+    processing_message: str = "Processing..."
+    # Saved with the entry but never shown while recording, so kept server-side
+    # rather than re-sent with every partial transcript.
+    _transcript_segments: list[classes.TranscriptSegment] = []
+    # The recording in progress; the browser sends its timeslices to the
+    # live-audio endpoint under this ID.
+    _recording_id: str = ""
+    _live_offset_seconds: float = 0.0
+    _live_transcribing: bool = False
 
     @rx.var
     def selected_class_info(self) -> classes.ClassInfo:
@@ -28,62 +127,142 @@ class RecorderState(rx.State):
 
     @rx.event
     async def handle_image_upload(self, files: list[rx.UploadFile]):
-        """Handle the image file selection, but do not save them yet."""
-        self.image_files = [file.name for file in files]
+        """Stage the selected images in the upload dir, but do not save them yet."""
+        await async_storage.write(_discard_staged, self.image_files)
+        self._image_digests = dict(
+            [await async_storage.write(_stage_upload, file) for file in files]
+        )
+        self.image_files = list(self._image_digests)
         if self.image_files:
             yield rx.toast.info(f"{len(self.image_files)} image(s) selected.")
 
+    @rx.var
+    def has_stalled_uploads(self) -> bool:
+        return any(upload["status"] == "stalled" for upload in self.video_uploads)
+
     @rx.event
-    async def handle_video_upload(self, files: list[rx.UploadFile]):
-        """Handle the video file selection, but do not save them yet."""
-        self.video_files = [file.name for file in files]
-        if self.video_files:
-            yield rx.toast.info(f"{len(self.video_files)} video(s) selected.")
+    def start_video_uploads(self, _value: str):
+        """Hands the selected videos to the browser's resumable chunked uploader."""
+        return rx.call_script(
+            f"startVideoUploads('video-upload-input', {MAX_VIDEO_FILES})",
+            callback=RecorderState.track_video_uploads,
+        )
+
+    @rx.event
+    def resume_video_uploads(self):
+        return rx.call_script(
+            "resumeVideoUploads()", callback=RecorderState.track_video_uploads
+        )
+
+    @rx.event(background=True)
+    async def track_video_uploads(self, started: list[dict]):
+        """Mirrors server-side upload progress into the state until uploads settle.
+
+        Tracking stops once every upload is complete, failed or stalled; resuming
+        a stalled upload starts it again.
+        """
+        async with self:
+            self._upload_tracker += 1
+            tracker = self._upload_tracker
+            current = {upload["id"]: upload for upload in self.video_uploads}
+            for upload_id in current.keys() - {item["id"] for item in started}:
+                uploads.discard(upload_id)
+            self.video_uploads = [
+                _tracked_upload(item, current.get(item["id"])) for item in started
+            ]
+            tracked = list(self.video_uploads)
+        if tracked:
+            yield rx.toast.info(f"Uploading {len(tracked)} video(s)...")
+        last_progress = {upload["id"]: time.monotonic() for upload in tracked}
+        while any(upload["status"] == "uploading" for upload in tracked):
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+            updated = []
+            for upload in tracked:
+                try:
+                    status = await async_storage.read(uploads.get_status, upload["id"])
+                except uploads.UploadError:
+                    updated.append({**upload, "status": "failed"})
+                    continue
+                if status["received_bytes"] != upload["received_bytes"]:
+                    last_progress[upload["id"]] = time.monotonic()
+                if status["complete"]:
+                    state = "complete"
+                elif (
+                    time.monotonic() - last_progress[upload["id"]]
+                    > UPLOAD_STALL_SECONDS
+                ):
+                    state = "stalled"
+                else:
+                    state = "uploading"
+                updated.append(
+                    {
+                        **upload,
+                        "received_bytes": status["received_bytes"],
+                        "percent": int(100 * status["received_bytes"] / status["size"]),
+                        "status": state,
+                    }
+                )
+            tracked = updated
+            async with self:
+                if self._upload_tracker != tracker:
+                    return
+                self.video_uploads = tracked
 
     def _reset_inputs(self):
         self.entry_date = datetime.date.today().isoformat()
         self.typed_text = ""
         self.image_files = []
-        self.video_files = []
+        self._image_digests = {}
+        self.video_uploads = []
         self.audio_file = None
         self.transcript = ""
+        self._transcript_segments = []
         self.recording_status = "idle"
         yield rx.clear_selected_files("image_upload")
-        yield rx.clear_selected_files("video_upload")
+        yield rx.call_script("clearVideoUploads('video-upload-input')")
         return
 
-    async def _get_upload_files(self, filenames: list[str]) -> list[rx.UploadFile]:
+    def _staged_paths(self, filenames: list[str]) -> list[Path]:
         upload_dir = rx.get_upload_dir()
-        files = []
-        for filename in filenames:
-            file_path = upload_dir / filename
-            if file_path.exists():
-                files.append(rx.UploadFile(name=filename, data=file_path.read_bytes()))
-        return files
+        return [
+            upload_dir / filename
+            for filename in filenames
+            if (upload_dir / filename).exists()
+        ]
 
     @rx.event
     async def save_entry_event(self):
-        image_uploads = await self.get_upload_files(upload_id="image_upload")
-        video_uploads = await self.get_upload_files(upload_id="video_upload")
-        audio_upload = None
-        if self.audio_file:
-            upload_dir = rx.get_upload_dir()
-            audio_path = upload_dir / self.audio_file
-            if audio_path.exists():
-                audio_upload = rx.UploadFile(
-                    name=self.audio_file, data=audio_path.read_bytes()
-                )
+        image_paths = self._staged_paths(self.image_files)
+        if any(upload["status"] != "complete" for upload in self.video_uploads):
+            yield rx.toast.warning("Please wait for the video uploads to finish.")
+            return
+        upload_dir = rx.get_upload_dir()
+        digests = {
+            upload_dir / name: digest for name, digest in self._image_digests.items()
+        }
+        video_paths = []
+        for upload in self.video_uploads:
+            if path := uploads.completed_path(upload["id"]):
+                video_paths.append(path)
+                if digest := uploads.completed_digest(upload["id"]):
+                    digests[path] = digest
+        audio_paths = self._staged_paths([self.audio_file] if self.audio_file else [])
         try:
-            success = storage.save_entry(
+            success = await async_storage.save_entry(
                 class_slug=self.selected_class_slug,
                 date_str=self.entry_date,
-                images=image_uploads,
-                videos=video_uploads,
-                audio_file=audio_upload,
+                images=image_paths,
+                videos=video_paths,
+                audio_file=audio_paths[0] if audio_paths else None,
                 typed_text=self.typed_text,
                 transcript=self.transcript,
+                segments=self._transcript_segments,
+                digests=digests,
             )
             if success:
+                for upload in self.video_uploads:
+                    await async_storage.write(uploads.discard, upload["id"])
+                await async_storage.write(_discard_staged, self.image_files)
                 yield rx.toast.success("Entry saved successfully!")
                 for event in self._reset_inputs():
                     yield event
@@ -96,16 +275,21 @@ class RecorderState(rx.State):
     @rx.event
     def start_recording(self):
         self.recording_status = "recording"
+        self.transcript = ""
+        self._transcript_segments = []
+        self._recording_id = uuid.uuid4().hex
+        self._live_offset_seconds = 0.0
         yield
         yield rx.call_script(
-            "startRecording()", callback=RecorderState.set_recording_status
+            f"startRecording('{self._recording_id}')",
+            callback=RecorderState.set_recording_status,
         )
 
     @rx.event
     def stop_recording(self):
         self.recording_status = "processing"
         yield
-        yield rx.call_script("stopRecording()")
+        yield rx.call_script("stopRecording()", callback=RecorderState.finish_recording)
 
     @rx.event
     def set_recording_status(self, status: str):
@@ -118,36 +302,163 @@ class RecorderState(rx.State):
             "permission_denied",
         ]:
             self.recording_status = status
+            if status == "recording":
+                return RecorderState.transcribe_live
 
     @rx.event(background=True)
-    async def process_audio_and_transcribe(self, audio_blob: rx.UploadFile):
+    async def transcribe_live(self):
+        """Transcribes the recording in windows while it is still being recorded.
+
+        Windows go through the transcription job queue alongside whole recordings.
+        When the queue is full a window is skipped, and the next one covers its
+        audio as well.
+        """
+        async with self:
+            recording_id = self._recording_id
+            if not recording_id or self._live_transcribing:
+                return
+            self._live_transcribing = True
         try:
+            live_path = uploads.live_audio_path(recording_id)
+            transcribed_size = 0
+            while True:
+                await asyncio.sleep(LIVE_CHUNK_SECONDS)
+                async with self:
+                    if (
+                        self.recording_status != "recording"
+                        or self._recording_id != recording_id
+                    ):
+                        return
+                    offset = self._live_offset_seconds
+                size = await async_storage.read(_file_size, live_path)
+                if size == transcribed_size:
+                    continue
+                try:
+                    job_id = transcription_jobs.submit_live_window(live_path, offset)
+                except transcription_jobs.QueueFullError as e:
+                    logging.warning(f"Skipping a live window, queue is full: {e}")
+                    continue
+                result = await transcription_jobs.wait(job_id)
+                transcription_jobs.forget(job_id)
+                transcribed_size = size
+                if not result:
+                    continue
+                async with self:
+                    if self._recording_id != recording_id:
+                        return
+                    segments, self._live_offset_seconds = result
+                    if segments:
+                        self._transcript_segments = [
+                            *self._transcript_segments,
+                            *segments,
+                        ]
+                        self.transcript = transcription.join_segments(
+                            self._transcript_segments
+                        )
+        finally:
+            async with self:
+                self._live_transcribing = False
+
+    @rx.event(background=True)
+    async def finish_recording(self, extension: str | None):
+        """Stages the finished recording and transcribes what live windows missed.
+
+        `extension` comes from the browser once every timeslice has reached the
+        live-audio endpoint, or is empty if the recording couldn't be sent.
+        """
+        try:
+            while True:
+                async with self:
+                    if not self._live_transcribing:
+                        recording_id = self._recording_id
+                        offset = self._live_offset_seconds
+                        previous = list(self._transcript_segments)
+                        self._recording_id = ""
+                        self._live_offset_seconds = 0.0
+                        self.audio_file = None
+                        break
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+            if not recording_id or extension not in RECORDING_EXTENSIONS:
+                if recording_id:
+                    await async_storage.write(uploads.discard, recording_id)
+                async with self:
+                    self.recording_status = "error"
+                    yield rx.toast.error("The recording could not be uploaded.")
+                return
+            filename = await async_storage.write(
+                _stage_recording, recording_id, extension
+            )
+            file_path = rx.get_upload_dir() / filename
             async with self:
-                self.audio_file = None
-                self.transcript = ""
-                audio_data = await audio_blob.read()
-                filename = (
-                    f"recording_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.wav"
-                )
-                upload_dir = rx.get_upload_dir()
-                upload_dir.mkdir(parents=True, exist_ok=True)
-                file_path = upload_dir / filename
-                with file_path.open("wb") as f:
-                    f.write(audio_data)
                 self.audio_file = filename
                 yield
-            transcript_result = transcription.transcribe_audio(Path(file_path))
+            if offset:
+                segments = await self._finish_live_transcription(
+                    file_path, offset, previous
+                )
+            else:
+                try:
+                    job_id = transcription_jobs.submit(file_path)
+                except transcription_jobs.QueueFullError as e:
+                    logging.warning(f"Transcription queue is full: {e}")
+                    async with self:
+                        self.recording_status = "idle"
+                        yield rx.toast.warning(
+                            "Audio saved, but the transcription queue is full. "
+                            "Please try again shortly."
+                        )
+                    return
+                while (
+                    job := transcription_jobs.get_job(job_id)
+                ) and not job.future.done():
+                    if job.status == "queued":
+                        ahead = transcription_jobs.queue_position(job_id)
+                        message = f"Queued ({ahead} ahead)..." if ahead else "Queued..."
+                    else:
+                        message = "Transcribing..."
+                    partial = transcription_jobs.get_partial_transcript(job_id)
+                    if message != self.processing_message or partial != self.transcript:
+                        async with self:
+                            self.processing_message = message
+                            self.transcript = partial
+                    await asyncio.sleep(JOB_POLL_INTERVAL)
+                segments = await transcription_jobs.wait(job_id)
+                transcription_jobs.forget(job_id)
             async with self:
-                if transcript_result is not None:
-                    self.transcript = transcript_result
+                self.processing_message = "Processing..."
+                if segments is not None:
+                    self._transcript_segments = segments
+                    self.transcript = transcription.join_segments(segments)
                     self.recording_status = "idle"
                     yield rx.toast.success("Audio processed and transcribed!")
                 else:
                     self.transcript = ""
+                    self._transcript_segments = []
                     self.recording_status = "error"
                     yield rx.toast.error("Transcription failed.")
         except Exception as e:
             logging.exception(f"Error processing audio: {e}")
             async with self:
                 self.recording_status = "error"
-                yield rx.toast.error("An error occurred during audio processing.")
\ No newline at end of file
+                yield rx.toast.error("An error occurred during audio processing.")
+
+    async def _finish_live_transcription(
+        self,
+        audio_path: Path,
+        offset: float,
+        previous: list[classes.TranscriptSegment],
+    ) -> list[classes.TranscriptSegment] | None:
+        """Transcribes only the audio recorded after the last live window."""
+        try:
+            job_id = transcription_jobs.submit_live_window(audio_path, offset, True)
+        except transcription_jobs.QueueFullError as e:
+            logging.warning(f"Transcription queue is full: {e}")
+            return None
+        async with self:
+            self.processing_message = "Transcribing..."
+        result = await transcription_jobs.wait(job_id)
+        transcription_jobs.forget(job_id)
+        if result is None:
+            return None
+        segments, _ = result
+        return previous + segments
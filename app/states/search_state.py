@@ -0,0 +1,55 @@
+import reflex as rx
+from typing import TypedDict
+import logging
+import time
+from app import async_storage, classes, index
+
+
+class SearchHit(TypedDict):
+    class_name: str
+    emoji: str
+    accent_color: str
+    date_str: str
+    href: str
+    snippet: list[index.SnippetPart]
+
+
+class SearchState(rx.State):
+    query: str = ""
+    results: list[SearchHit] = []
+    elapsed_ms: float = 0.0
+    has_searched: bool = False
+
+    @rx.event
+    async def run_search(self, form_data: dict):
+        self.query = form_data.get("query", "").strip()
+        if not self.query:
+            self.results = []
+            self.has_searched = False
+            return
+        started = time.perf_counter()
+        matches = await async_storage.search_entries(self.query)
+        self.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.has_searched = True
+        self.results = [
+            {
+                "class_name": info["name"],
+                "emoji": info["emoji"],
+                "accent_color": info["accent_color"],
+                "date_str": match["date_str"],
+                "href": (
+                    f"/gallery?class={match['class_slug']}&date={match['date_str']}"
+                ),
+                "snippet": match["snippet"],
+            }
+            for match in matches
+            if (info := classes.CLASS_INFO.get(match["class_slug"]))
+        ]
+        logging.info(
+            f"Search for {self.query!r} returned {len(self.results)} results "
+            f"in {self.elapsed_ms}ms"
+        )
+
+    @rx.var
+    def result_count(self) -> int:
+        return len(self.results)
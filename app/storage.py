@@ -1,64 +1,183 @@
-import reflex as rx
 from pathlib import Path
+import datetime
+import json
 import logging
+import shutil
+import sys
+import uuid
 from typing import Optional, Union
+from app import blobs, index, media, metrics
+from app.classes import TranscriptSegment
+from app.config import DATA_DIR
 
-DATA_DIR = Path("data/")
+SEGMENTS_FILENAME = "segments.json"
 
 
-def get_entry_dir(class_slug: str, date_str: str) -> Path:
-    """Constructs and creates the directory for a given class and date."""
-    entry_dir = DATA_DIR / class_slug / date_str
-    entry_dir.mkdir(parents=True, exist_ok=True)
-    return entry_dir
+ENTRY_ID_TIME_FORMAT = "%Y%m%dT%H%M%S%f"
+# Entries saved before IDs carried microseconds.
+ENTRY_ID_SECONDS_FORMAT = "%Y%m%dT%H%M%S"
 
+SAVE_SECONDS = metrics.Histogram(
+    "artifactmaker_save_entry_seconds", "Time taken by storage.save_entry."
+)
+SAVE_BYTES = metrics.Histogram(
+    "artifactmaker_save_entry_bytes",
+    "Bytes stored per saved entry, media and text included.",
+    buckets=metrics.BYTES_BUCKETS,
+)
+LOAD_SECONDS = metrics.Histogram(
+    "artifactmaker_load_entry_seconds", "Time taken by storage.load_entry."
+)
 
+
+def get_date_dir(class_slug: str, date_str: str) -> Path:
+    """Returns the directory holding all of a class's entries for a date."""
+    return DATA_DIR / class_slug / date_str
+
+
+def get_entry_dir(class_slug: str, date_str: str, entry_id: str) -> Path:
+    return get_date_dir(class_slug, date_str) / entry_id
+
+
+def new_entry_id(saved_at: Optional[datetime.datetime] = None) -> str:
+    """Returns a fresh entry ID: the save time plus a random suffix."""
+    saved_at = saved_at or datetime.datetime.now()
+    return f"{saved_at.strftime(ENTRY_ID_TIME_FORMAT)}-{uuid.uuid4().hex[:6]}"
+
+
+def is_entry_id(name: str) -> bool:
+    return index.ENTRY_ID_PATTERN.fullmatch(name) is not None
+
+
+def entry_saved_at(entry_id: str) -> Optional[datetime.datetime]:
+    timestamp = entry_id.split("-", 1)[0]
+    for time_format in (ENTRY_ID_TIME_FORMAT, ENTRY_ID_SECONDS_FORMAT):
+        try:
+            return datetime.datetime.strptime(timestamp, time_format)
+        except ValueError:
+            continue
+    return None
+
+
+def get_entry_version(class_slug: str, date_str: str) -> int:
+    """Returns a value that changes whenever a date's entries are saved or redone."""
+    date_dir = get_date_dir(class_slug, date_str)
+    try:
+        return max(
+            [date_dir.stat().st_mtime_ns]
+            + [
+                (date_dir / entry_id).stat().st_mtime_ns
+                for entry_id in index.entry_ids_on_disk(class_slug, date_str)
+            ]
+        )
+    except FileNotFoundError:
+        return -1
+
+
+def _entry_bytes(entry_dir: Path) -> int:
+    return sum(path.stat().st_size for path in entry_dir.rglob("*") if path.is_file())
+
+
+def _write_segments(entry_dir: Path, segments: list[TranscriptSegment]) -> None:
+    """Stores segment timings compactly as [start, end, text, words?] rows."""
+    segments_path = entry_dir / SEGMENTS_FILENAME
+    if not segments:
+        segments_path.unlink(missing_ok=True)
+        return
+    rows = []
+    for segment in segments:
+        row = [segment["start"], segment["end"], segment["text"]]
+        if segment.get("words"):
+            row.append([list(word) for word in segment["words"]])
+        rows.append(row)
+    segments_path.write_text(json.dumps(rows, separators=(",", ":")))
+
+
+@metrics.timed(SAVE_SECONDS)
 def save_entry(
     class_slug: str,
     date_str: str,
-    images: list[rx.UploadFile],
-    videos: list[rx.UploadFile],
-    audio_file: Optional[rx.UploadFile],
+    images: list[Path],
+    videos: list[Path],
+    audio_file: Optional[Path],
     typed_text: str,
     transcript: str,
+    segments: Optional[list[TranscriptSegment]] = None,
+    digests: Optional[dict[Path, str]] = None,
 ) -> bool:
-    """Saves all parts of a classroom artifact entry to the file system."""
+    """Saves a classroom artifact as a new entry alongside any others for the date.
+
+    Media arguments are paths to uploaded files, which are linked into the entry and
+    deleted only once it is saved, so a failed save leaves them for a retry;
+    `digests` holds the SHA-256 of any that were hashed while they were uploaded.
+    The entry is assembled in a hidden directory and renamed into place, so readers
+    never see a half-written entry and saves never touch each other's files.
+    """
+    digests = digests or {}
+    uploaded = [*images, *videos, *([audio_file] if audio_file else [])]
+    entry_id = new_entry_id()
+    date_dir = get_date_dir(class_slug, date_str)
+    entry_dir = date_dir / f".tmp-{entry_id}"
     try:
-        entry_dir = get_entry_dir(class_slug, date_str)
-        if images:
-            image_dir = entry_dir / "images"
-            image_dir.mkdir(exist_ok=True)
-            for image in images:
-                with open(image_dir / image.name, "wb") as f:
-                    f.write(image.read())
-        if videos:
-            video_dir = entry_dir / "videos"
-            video_dir.mkdir(exist_ok=True)
-            for video in videos:
-                with open(video_dir / video.name, "wb") as f:
-                    f.write(video.read())
-        audio_dir = entry_dir / "audio"
-        audio_dir.mkdir(exist_ok=True)
-        audio_path = audio_dir / "recording.wav"
+        entry_dir.mkdir(parents=True)
+        stored: dict[str, str] = {}
+        saved_videos = []
+        for kind, sources in (("images", images), ("videos", videos)):
+            for source in sources:
+                digest, path = blobs.add_to_entry(
+                    source, entry_dir / kind, digests.get(source)
+                )
+                stored[path.relative_to(entry_dir).as_posix()] = digest
+                if kind == "images":
+                    media.get_image_derivatives(path)
+                else:
+                    saved_videos.append(path)
+        if stored:
+            blobs.update_manifest(entry_dir, stored)
         if audio_file:
-            with open(audio_path, "wb") as f:
-                f.write(audio_file.read())
-        else:
-            audio_path.touch()
+            media.store_audio(audio_file, entry_dir)
         (entry_dir / "notes.txt").write_text(typed_text or "")
         (entry_dir / "transcript.txt").write_text(transcript or "")
-        logging.info(f"Successfully saved entry for {class_slug} on {date_str}")
-        return True
+        _write_segments(entry_dir, segments or [])
+        final_dir = date_dir / entry_id
+        entry_dir.rename(final_dir)
     except Exception as e:
         logging.exception(f"Error saving entry for {class_slug} on {date_str}: {e}")
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        if missing := [source for source in uploaded if not source.exists()]:
+            logging.error(f"Failed save of {entry_id} lost its uploads: {missing}")
         return False
+    # The entry is saved once it is renamed into place. Failing to index it or
+    # queue its videos must not report the save as failed, or a retry would save
+    # it twice: `python -m app.index rebuild` indexes anything missed here, and the
+    # gallery queues unprocessed videos again when it shows them.
+    logging.info(f"Saved entry {entry_id} for {class_slug} on {date_str}")
+    for source in uploaded:
+        try:
+            source.unlink(missing_ok=True)
+        except OSError as e:
+            logging.warning(f"Couldn't remove saved upload {source}: {e}")
+    try:
+        index.record_entry(class_slug, date_str, entry_id)
+    except Exception as e:
+        logging.exception(f"Couldn't index entry {entry_id} for {class_slug}: {e}")
+    try:
+        media.schedule_video_processing(
+            [final_dir / video.relative_to(entry_dir) for video in saved_videos]
+        )
+    except Exception as e:
+        logging.exception(f"Couldn't queue videos of entry {entry_id}: {e}")
+    if metrics.ENABLED:
+        SAVE_BYTES.observe(_entry_bytes(final_dir))
+    return True
 
 
+@metrics.timed(LOAD_SECONDS)
 def load_entry(
-    class_slug: str, date_str: str
-) -> Optional[dict[str, Union[list[Path], Path, str]]]:
+    class_slug: str, date_str: str, entry_id: str
+) -> Optional[dict[str, Union[list[Path], Path, str, bool]]]:
     """Loads an entry's content from the file system."""
-    entry_dir = DATA_DIR / class_slug / date_str
+    entry_dir = get_entry_dir(class_slug, date_str, entry_id)
     if not entry_dir.is_dir():
         return None
 
@@ -73,20 +192,108 @@ def load_entry(
     try:
         images = get_files("images")
         videos = get_files("videos")
-        audio_path = entry_dir / "audio" / "recording.wav"
-        if not audio_path.exists() or audio_path.stat().st_size == 0:
-            audio_path = None
+        audio_path = media.find_audio(entry_dir)
         notes_path = entry_dir / "notes.txt"
         typed_text = notes_path.read_text() if notes_path.exists() else ""
         transcript_path = entry_dir / "transcript.txt"
         transcript = transcript_path.read_text() if transcript_path.exists() else ""
         return {
+            "id": entry_id,
             "images": images,
             "videos": videos,
             "audio_path": audio_path,
+            "audio_type": media.audio_mime_type(audio_path) if audio_path else "",
             "typed_text": typed_text,
             "transcript": transcript,
+            "has_segments": (entry_dir / SEGMENTS_FILENAME).is_file(),
         }
     except Exception as e:
-        logging.exception(f"Error loading entry for {class_slug} on {date_str}: {e}")
-        return None
\ No newline at end of file
+        logging.exception(
+            f"Error loading entry {entry_id} for {class_slug} on {date_str}: {e}"
+        )
+        return None
+
+
+def load_entries(
+    class_slug: str, date_str: str
+) -> list[dict[str, Union[list[Path], Path, str, bool]]]:
+    """Loads every entry saved for a date, oldest first."""
+    entries = [
+        load_entry(class_slug, date_str, entry_id)
+        for entry_id in index.entry_ids_on_disk(class_slug, date_str)
+    ]
+    return [entry for entry in entries if entry is not None]
+
+
+def load_segments(
+    class_slug: str, date_str: str, entry_id: str
+) -> list[TranscriptSegment]:
+    """Loads an entry's timestamped transcript segments, if it has any."""
+    segments_path = get_entry_dir(class_slug, date_str, entry_id) / SEGMENTS_FILENAME
+    try:
+        rows = json.loads(segments_path.read_text())
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        logging.exception(f"Error loading segments for {class_slug} on {date_str}: {e}")
+        return []
+    return [
+        {
+            "start": row[0],
+            "end": row[1],
+            "text": row[2],
+            "words": [tuple(word) for word in row[3]] if len(row) > 3 else [],
+        }
+        for row in rows
+    ]
+
+
+def migrate_legacy_entries() -> int:
+    """Moves entries saved directly in a date directory into an entry of their own.
+
+    Before a date could hold several entries, its files sat in the date directory
+    itself. Run it once, with the app stopped, via `python -m app.storage migrate`;
+    running it again is harmless. Returns how many entries it moved.
+    """
+    migrated = 0
+    if not DATA_DIR.is_dir():
+        return migrated
+    for class_dir in DATA_DIR.iterdir():
+        if not class_dir.is_dir() or class_dir.name.startswith("."):
+            continue
+        for date_dir in class_dir.iterdir():
+            if not date_dir.is_dir():
+                continue
+            legacy = [
+                path
+                for path in date_dir.iterdir()
+                if not path.name.startswith(".") and not is_entry_id(path.name)
+            ]
+            if not legacy:
+                continue
+            saved_at = datetime.datetime.fromtimestamp(date_dir.stat().st_mtime)
+            entry_id = new_entry_id(saved_at)
+            tmp_dir = date_dir / f".tmp-{entry_id}"
+            tmp_dir.mkdir()
+            for path in legacy:
+                path.rename(tmp_dir / path.name)
+            tmp_dir.rename(date_dir / entry_id)
+            index.record_entry(class_dir.name, date_dir.name, entry_id)
+            migrated += 1
+    if migrated:
+        logging.info(f"Moved {migrated} single-entry dates into entry directories.")
+    return migrated
+
+
+def main(argv: list[str]) -> int:
+    command = argv[0] if argv else ""
+    if command == "migrate":
+        print(f"Moved {migrate_legacy_entries()} dates into entry directories.")
+        return 0
+    print("usage: python -m app.storage migrate")
+    return 2
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from app import metrics
+from app.config import TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_BYTES
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Lookups mostly happen in transcription worker processes, whose metrics reach
+# the web process's /metrics along with the rest of theirs.
+LOOKUPS = metrics.Counter(
+    "artifactmaker_transcript_cache_lookups_total",
+    "Transcript cache lookups, by whether they hit.",
+    ("result",),
+)
+EVICTIONS = metrics.Counter(
+    "artifactmaker_transcript_cache_evictions_total",
+    "Transcripts evicted to keep the cache under its size limit.",
+)
+
+_lock = threading.Lock()
+# Bytes this process believes the cache holds: one scan to start with, then its
+# own writes. Other processes' writes show up at the next scan, which happens
+# whenever the estimate passes the limit.
+_size_bytes: int | None = None
+
+
+def cache_key(audio_path: Path, params: str) -> str:
+    """Hashes the audio bytes together with the decoding parameters."""
+    digest = hashlib.sha256(params.encode())
+    with open(audio_path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _path_for(key: str) -> Path:
+    return TRANSCRIPT_CACHE_DIR / key[:2] / f"{key}.txt"
+
+
+def get(key: str) -> str | None:
+    """Returns a cached transcript and marks it as recently used."""
+    path = _path_for(key)
+    try:
+        transcript = path.read_text()
+        os.utime(path)
+    except FileNotFoundError:
+        LOOKUPS.inc(result="miss")
+        return None
+    except OSError as e:
+        logging.warning(f"Could not read cached transcript {path}: {e}")
+        LOOKUPS.inc(result="miss")
+        return None
+    LOOKUPS.inc(result="hit")
+    return transcript
+
+
+def put(key: str, transcript: str) -> None:
+    """Stores a transcript atomically, evicting old ones once over the size limit."""
+    global _size_bytes
+    path = _path_for(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(transcript)
+        added = tmp_path.stat().st_size
+        os.replace(tmp_path, path)
+        with _lock:
+            if _size_bytes is None:
+                _size_bytes = _scan()[1]
+            else:
+                _size_bytes += added
+            if _size_bytes > TRANSCRIPT_CACHE_MAX_BYTES:
+                _size_bytes = _evict()
+    except OSError as e:
+        logging.warning(f"Could not cache transcript {path}: {e}")
+
+
+def _scan() -> tuple[list[tuple[float, int, Path]], int]:
+    """Returns (mtime, size, path) for every cached transcript, and their total size."""
+    entries = []
+    total = 0
+    for path in TRANSCRIPT_CACHE_DIR.glob("*/*.txt"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    return entries, total
+
+
+def _evict() -> int:
+    """Deletes the oldest transcripts until the cache fits; returns its new size."""
+    entries, total = _scan()
+    for _, size, path in sorted(entries):
+        if total <= TRANSCRIPT_CACHE_MAX_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        EVICTIONS.inc()
+    return total
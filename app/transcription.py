@@ -1,41 +1,399 @@
-import reflex as rx
-from faster_whisper import WhisperModel
+import json
 import logging
+import os
+import threading
+import time
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, TypedDict
+from app import metrics, transcript_cache, transcription_client
+from app.classes import TranscriptSegment
+from app.config import (
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_CPU_THREADS,
+    WHISPER_MODEL,
+    WHISPER_NUM_WORKERS,
+    WHISPER_PRELOAD,
+    WHISPER_PROFILE,
+    WHISPER_VAD,
+    WHISPER_VAD_MIN_SILENCE_MS,
+    WHISPER_WORD_TIMESTAMPS,
+)
 
-MODEL_SIZE = "small.en"
-model: WhisperModel | None = None
+# faster_whisper pulls in ctranslate2, tokenizers and av, which costs every
+# compile, hot reload and gallery-only worker that never transcribes. It is
+# imported only once a model is loaded or audio is decoded.
+if TYPE_CHECKING:
+    from faster_whisper import WhisperModel
 
+MODEL_SIZE = WHISPER_MODEL
+SAMPLE_RATE = 16000
+LANGUAGE = "en"
+MIN_LIVE_WINDOW_SECONDS = 2.0
+# Decoded ahead of a live window so the decoder has settled by its start.
+DECODE_PREROLL_SECONDS = 0.5
 
-def get_model() -> WhisperModel | None:
-    """Loads the Whisper model, caching it in a global variable."""
-    global model
-    if model is None:
+
+# The segments completed in a live window, and the offset to resume from.
+LiveWindow = tuple[list[TranscriptSegment], float]
+
+
+class DecodingProfile(TypedDict):
+    beam_size: int
+    best_of: int
+    temperature: list[float]
+
+
+# Temperature fallback retries a segment at the next temperature when decoding
+# looks degenerate; a single temperature disables it.
+DECODING_PROFILES: dict[str, DecodingProfile] = {
+    "fast": {"beam_size": 1, "best_of": 1, "temperature": [0.0]},
+    "balanced": {
+        "beam_size": 5,
+        "best_of": 5,
+        "temperature": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
+    },
+    "accurate": {
+        "beam_size": 10,
+        "best_of": 10,
+        "temperature": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
+    },
+}
+
+
+MODEL_LOAD_SECONDS = metrics.Histogram(
+    "artifactmaker_whisper_model_load_seconds",
+    "Time taken to load a Whisper model.",
+    ("model",),
+)
+MODEL_RSS_BYTES = metrics.Histogram(
+    "artifactmaker_whisper_model_rss_bytes",
+    "Resident memory added to a process by loading a Whisper model into it.",
+    ("model",),
+    metrics.BYTES_BUCKETS,
+)
+TRANSCRIBE_SECONDS = metrics.Histogram(
+    "artifactmaker_transcription_seconds",
+    "Time taken to decode audio with Whisper, cache hits excluded.",
+    ("mode", "profile"),
+)
+TRANSCRIBED_AUDIO_SECONDS = metrics.Histogram(
+    "artifactmaker_transcription_audio_seconds",
+    "Seconds of audio decoded per transcription.",
+    ("mode", "profile"),
+    metrics.AUDIO_SECONDS_BUCKETS,
+)
+
+
+class ModelStats(TypedDict):
+    load_seconds: float
+    rss_delta_bytes: int
+
+
+_models: dict[str, "WhisperModel"] = {}
+_model_stats: dict[str, ModelStats] = {}
+_models_lock = threading.Lock()
+
+
+def _current_rss_bytes() -> int:
+    """Returns the resident set size of this process, or 0 where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def get_model(model_size: str = MODEL_SIZE) -> "WhisperModel | None":
+    """Returns a loaded Whisper model from the registry, loading it at most once."""
+    loaded = _models.get(model_size)
+    if loaded is not None:
+        return loaded
+    with _models_lock:
+        if model_size in _models:
+            return _models[model_size]
         try:
-            logging.info(f"Loading faster-whisper model: {MODEL_SIZE}...")
-            model = WhisperModel(MODEL_SIZE, device="cpu", compute_type="int8")
-            logging.info("Model loaded successfully.")
+            logging.info(
+                f"Loading faster-whisper model: {model_size} "
+                f"(compute_type={WHISPER_COMPUTE_TYPE}, "
+                f"cpu_threads={WHISPER_CPU_THREADS})..."
+            )
+            from faster_whisper import WhisperModel
+
+            rss_before = _current_rss_bytes()
+            started = time.perf_counter()
+            loaded = WhisperModel(
+                model_size,
+                device="cpu",
+                compute_type=WHISPER_COMPUTE_TYPE,
+                cpu_threads=WHISPER_CPU_THREADS,
+                num_workers=WHISPER_NUM_WORKERS,
+            )
+            stats: ModelStats = {
+                "load_seconds": time.perf_counter() - started,
+                "rss_delta_bytes": max(0, _current_rss_bytes() - rss_before),
+            }
         except Exception as e:
-            logging.exception(f"Failed to load Whisper model '{MODEL_SIZE}': {e}")
+            logging.exception(f"Failed to load Whisper model '{model_size}': {e}")
             return None
-    return model
+        _models[model_size] = loaded
+        _model_stats[model_size] = stats
+        MODEL_LOAD_SECONDS.observe(stats["load_seconds"], model=model_size)
+        MODEL_RSS_BYTES.observe(stats["rss_delta_bytes"], model=model_size)
+        logging.info(
+            f"Model {model_size} loaded in {stats['load_seconds']:.1f}s "
+            f"(+{stats['rss_delta_bytes'] / 2**20:.0f} MiB)."
+        )
+        return loaded
 
 
-def transcribe_audio(audio_path: Path) -> str | None:
-    """Transcribes an audio file using the pre-loaded Whisper model."""
+def get_model_stats() -> dict[str, ModelStats]:
+    """Returns load time and memory footprint for each loaded model."""
+    with _models_lock:
+        return dict(_model_stats)
+
+
+def preload_models() -> None:
+    """Loads the configured models so the first transcription doesn't wait for them.
+
+    Only processes that decode should call this: each transcription pool worker
+    does as it starts. The web process never decodes unless the transcription
+    server goes away, and then loads a model on first use.
+    """
+    for model_size in WHISPER_PRELOAD:
+        get_model(model_size)
+
+
+def get_profile(name: str = WHISPER_PROFILE) -> DecodingProfile:
+    """Returns a decoding profile by name, falling back to "balanced"."""
+    if name not in DECODING_PROFILES:
+        logging.warning(f"Unknown decoding profile '{name}', using 'balanced'.")
+        name = "balanced"
+    return DECODING_PROFILES[name]
+
+
+def load_audio(audio_path: Path, start_seconds: float = 0.0):
+    """Decodes a recording once into the 16 kHz mono samples Whisper works on.
+
+    With `start_seconds`, only the audio from there on is decoded: earlier packets
+    are read past without decoding them, so transcribing the end of a long
+    recording costs no more than the end itself.
+    """
+    if start_seconds <= 0:
+        from faster_whisper import decode_audio
+
+        return decode_audio(str(audio_path), sampling_rate=SAMPLE_RATE)
+
+    import av
+    import numpy as np
+
+    resampler = av.audio.resampler.AudioResampler(
+        format="s16", layout="mono", rate=SAMPLE_RATE
+    )
+    skip_before = start_seconds - DECODE_PREROLL_SECONDS
+    decoded_from = None
+    pieces = []
+    with av.open(str(audio_path), metadata_errors="ignore") as container:
+        stream = container.streams.audio[0]
+        try:
+            for packet in container.demux(stream):
+                if packet.pts is None:
+                    continue
+                if decoded_from is None and packet.pts * packet.time_base < skip_before:
+                    continue
+                for frame in packet.decode():
+                    if decoded_from is None:
+                        decoded_from = float(frame.pts * frame.time_base)
+                    frame.pts = None
+                    pieces.extend(f.to_ndarray() for f in resampler.resample(frame))
+        except av.error.InvalidDataError:
+            # A recording that is still growing can end partway through a packet.
+            pass
+        pieces.extend(f.to_ndarray() for f in resampler.resample(None))
+    if decoded_from is None:
+        return np.zeros(0, dtype=np.float32)
+    audio = np.concatenate(pieces, axis=None).astype(np.float32) / 32768.0
+    return audio[max(0, round((start_seconds - decoded_from) * SAMPLE_RATE)) :]
+
+
+def _transcribe_options(profile: str, vad: bool) -> dict:
+    options = {
+        **get_profile(profile),
+        "language": LANGUAGE,
+        "word_timestamps": WHISPER_WORD_TIMESTAMPS,
+        "vad_filter": vad,
+    }
+    if vad:
+        # Silent stretches are cut before decoding; timestamps still refer to
+        # the original recording.
+        options["vad_parameters"] = {
+            "min_silence_duration_ms": WHISPER_VAD_MIN_SILENCE_MS
+        }
+    return options
+
+
+def _cache_params(model_size: str, profile: str, vad: bool) -> str:
+    """Describes everything besides the audio that affects the transcript."""
+    options = _transcribe_options(profile, vad)
+    return f"{model_size}|{WHISPER_COMPUTE_TYPE}|{sorted(options.items())}|segments"
+
+
+def _to_segment(segment, offset_seconds: float = 0.0) -> TranscriptSegment:
+    """Converts a faster-whisper segment to a plain dict on the recording's timeline."""
+    return {
+        "start": round(segment.start + offset_seconds, 2),
+        "end": round(segment.end + offset_seconds, 2),
+        "text": segment.text.strip(),
+        "words": [
+            (
+                round(word.start + offset_seconds, 2),
+                round(word.end + offset_seconds, 2),
+                word.word,
+            )
+            for word in segment.words or []
+        ],
+    }
+
+
+def join_segments(segments: list[TranscriptSegment]) -> str:
+    return " ".join(segment["text"] for segment in segments).strip()
+
+
+def transcribe_audio_segments(
+    audio_path: Path,
+    on_segment: Callable[[TranscriptSegment], None] | None = None,
+    profile: str = WHISPER_PROFILE,
+    vad: bool = WHISPER_VAD,
+) -> list[TranscriptSegment] | None:
+    """Transcribes an audio file into timestamped segments.
+
+    Results are cached by audio content, so re-transcribing the same recording is
+    instant. If given, `on_segment` is called with each segment as soon as it is
+    decoded.
+    """
+    if not audio_path.exists() or audio_path.stat().st_size == 0:
+        logging.warning(f"Audio file does not exist or is empty: {audio_path}")
+        return []
+    cache_key = transcript_cache.cache_key(
+        audio_path, _cache_params(MODEL_SIZE, profile, vad)
+    )
+    cached = transcript_cache.get(cache_key)
+    if cached is not None:
+        logging.info(f"Using cached transcript for {audio_path}.")
+        segments = json.loads(cached)
+        if on_segment is not None:
+            for segment in segments:
+                on_segment(segment)
+        return segments
+    if transcription_client.ENABLED:
+        try:
+            segments = transcription_client.transcribe(
+                audio_path, on_segment, profile, vad
+            )
+        except transcription_client.ServerUnavailable as e:
+            logging.warning(f"Transcription server unavailable, decoding here: {e}")
+            segments = decode_segments(audio_path, on_segment, profile, vad)
+    else:
+        segments = decode_segments(audio_path, on_segment, profile, vad)
+    if segments is not None:
+        transcript_cache.put(cache_key, json.dumps(segments))
+    return segments
+
+
+def decode_segments(
+    audio_path: Path,
+    on_segment: Callable[[TranscriptSegment], None] | None = None,
+    profile: str = WHISPER_PROFILE,
+    vad: bool = WHISPER_VAD,
+) -> list[TranscriptSegment] | None:
+    """Decodes audio with this process's own Whisper model, bypassing the cache."""
     whisper_model = get_model()
     if whisper_model is None:
         logging.error("Transcription failed because Whisper model is not available.")
         return None
-    if not audio_path.exists() or audio_path.stat().st_size == 0:
-        logging.warning(f"Audio file does not exist or is empty: {audio_path}")
-        return ""
     try:
         logging.info(f"Starting transcription for {audio_path}...")
-        segments, _ = whisper_model.transcribe(audio_path, beam_size=5, language="en")
-        transcript = " ".join([segment.text for segment in segments])
+        started = time.perf_counter()
+        decoded, info = whisper_model.transcribe(
+            load_audio(audio_path), **_transcribe_options(profile, vad)
+        )
+        segments = []
+        for segment in decoded:
+            segments.append(_to_segment(segment))
+            if on_segment is not None:
+                on_segment(segments[-1])
+        TRANSCRIBE_SECONDS.observe(
+            time.perf_counter() - started, mode="file", profile=profile
+        )
+        TRANSCRIBED_AUDIO_SECONDS.observe(info.duration, mode="file", profile=profile)
         logging.info(f"Transcription successful for {audio_path}.")
-        return transcript.strip()
+        return segments
     except Exception as e:
         logging.exception(f"Error during audio transcription for {audio_path}: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def transcribe_audio(audio_path: Path) -> str | None:
+    """Transcribes an audio file using the pre-loaded Whisper model."""
+    segments = transcribe_audio_segments(audio_path)
+    return None if segments is None else join_segments(segments)
+
+
+def transcribe_live_window(
+    audio_path: Path, offset_seconds: float, final: bool = False
+) -> LiveWindow | None:
+    """Transcribes the audio after `offset_seconds` in a recording that may still grow.
+
+    Returns the completed segments, timed from the start of the recording, and the
+    offset to resume from. Unless `final` is set, the last segment is held back
+    because it may be cut off mid-word.
+    """
+    if transcription_client.ENABLED:
+        try:
+            return transcription_client.transcribe_live_window(
+                audio_path, offset_seconds, final
+            )
+        except transcription_client.ServerUnavailable as e:
+            logging.warning(f"Transcription server unavailable, decoding here: {e}")
+    return decode_live_window(audio_path, offset_seconds, final)
+
+
+def decode_live_window(
+    audio_path: Path, offset_seconds: float, final: bool = False
+) -> LiveWindow | None:
+    """Does the work of transcribe_live_window with this process's own model."""
+    whisper_model = get_model()
+    if whisper_model is None:
+        logging.error("Transcription failed because Whisper model is not available.")
+        return None
+    try:
+        window = load_audio(audio_path, offset_seconds)
+        window_seconds = len(window) / SAMPLE_RATE
+        if window_seconds < MIN_LIVE_WINDOW_SECONDS and not final:
+            return [], offset_seconds
+        started = time.perf_counter()
+        decoded, _ = whisper_model.transcribe(
+            window, **_transcribe_options(WHISPER_PROFILE, WHISPER_VAD)
+        )
+        decoded = list(decoded)
+        TRANSCRIBE_SECONDS.observe(
+            time.perf_counter() - started, mode="live", profile=WHISPER_PROFILE
+        )
+        TRANSCRIBED_AUDIO_SECONDS.observe(
+            window_seconds, mode="live", profile=WHISPER_PROFILE
+        )
+        if not decoded and WHISPER_VAD and not final:
+            # No speech at all: skip the silence, keeping a short tail in case
+            # a word is just starting.
+            return [], offset_seconds + max(
+                0.0, window_seconds - MIN_LIVE_WINDOW_SECONDS
+            )
+        if not final:
+            decoded = decoded[:-1]
+        if not decoded:
+            return [], offset_seconds
+        segments = [_to_segment(segment, offset_seconds) for segment in decoded]
+        return segments, offset_seconds + decoded[-1].end
+    except Exception as e:
+        logging.exception(f"Error during live transcription for {audio_path}: {e}")
+        return None
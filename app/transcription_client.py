@@ -0,0 +1,125 @@
+import json
+import logging
+import socket
+from pathlib import Path
+from typing import Callable
+from app import metrics
+from app.classes import TranscriptSegment
+from app.config import TRANSCRIPTION_SERVER_TIMEOUT, TRANSCRIPTION_SOCKET
+
+# Requests and replies are JSON lines over the transcription server's Unix socket
+# (see app.transcription_server). The server sends a heartbeat line at least every
+# HEARTBEAT_SECONDS, so silence longer than the timeout means it has hung.
+ENABLED = bool(TRANSCRIPTION_SOCKET)
+CONNECT_TIMEOUT_SECONDS = 2.0
+HEARTBEAT_SECONDS = 5.0
+
+# Recorded by the server and carried back with each reply, together with its
+# decode timings, so they show up on the backend's /metrics like the pool's do.
+SERVER_QUEUE_DEPTH = metrics.Histogram(
+    "artifactmaker_transcription_server_queue_depth",
+    "Requests already waiting for a decoding slot when one reaches the server.",
+    buckets=metrics.DEPTH_BUCKETS,
+)
+SERVER_WAIT_SECONDS = metrics.Histogram(
+    "artifactmaker_transcription_server_wait_seconds",
+    "Time a request waited for a decoding slot on the transcription server.",
+)
+
+
+class ServerUnavailable(Exception):
+    """Raised when the server can't be reached, so the caller should work in-process."""
+
+
+def dump_metrics() -> list:
+    """Drains this process's metrics into JSON-friendly [name, labels, values] rows."""
+    return [
+        [name, list(key), values]
+        for name, series in metrics.drain().items()
+        for key, values in series.items()
+    ]
+
+
+def _merge_metrics(rows: list) -> None:
+    drained: dict[str, dict[tuple[str, ...], list[float]]] = {}
+    for name, key, values in rows:
+        drained.setdefault(name, {})[tuple(key)] = values
+    metrics.merge(drained)
+
+
+def _request(payload: dict, on_segment: Callable[[dict], None] | None = None):
+    """Sends one request and returns its result, passing streamed segments on."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT_SECONDS)
+    try:
+        sock.connect(TRANSCRIPTION_SOCKET)
+    except OSError as e:
+        sock.close()
+        raise ServerUnavailable(f"{TRANSCRIPTION_SOCKET}: {e}") from None
+    streamed = 0
+    try:
+        sock.settimeout(TRANSCRIPTION_SERVER_TIMEOUT)
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        with sock.makefile("rb") as replies:
+            for line in replies:
+                reply = json.loads(line)
+                if "metrics" in reply:
+                    _merge_metrics(reply["metrics"])
+                if "segment" in reply:
+                    streamed += 1
+                    if on_segment is not None:
+                        on_segment(reply["segment"])
+                elif "result" in reply:
+                    return reply["result"]
+                elif "error" in reply:
+                    logging.error(f"Transcription server failed: {reply['error']}")
+                    return None
+        raise ConnectionError("connection closed before a result")
+    except (OSError, ValueError) as e:
+        # Segments already passed on can't be taken back, so only a request that
+        # produced nothing yet is safe to repeat in-process.
+        if not streamed:
+            raise ServerUnavailable(f"{TRANSCRIPTION_SOCKET}: {e}") from None
+        logging.error(f"Lost the transcription server mid-request: {e}")
+        return None
+    finally:
+        sock.close()
+
+
+def transcribe(
+    audio_path: Path,
+    on_segment: Callable[[TranscriptSegment], None] | None,
+    profile: str,
+    vad: bool,
+) -> list[TranscriptSegment] | None:
+    return _request(
+        {
+            "op": "transcribe",
+            "path": str(audio_path.resolve()),
+            "profile": profile,
+            "vad": vad,
+        },
+        on_segment,
+    )
+
+
+def transcribe_live_window(
+    audio_path: Path, offset_seconds: float, final: bool
+) -> tuple[list[TranscriptSegment], float] | None:
+    result = _request(
+        {
+            "op": "live",
+            "path": str(audio_path.resolve()),
+            "offset": offset_seconds,
+            "final": final,
+        }
+    )
+    return None if result is None else (result[0], result[1])
+
+
+def status() -> dict | None:
+    """Returns the server's loaded models and load, or None if it isn't running."""
+    try:
+        return _request({"op": "status"})
+    except ServerUnavailable:
+        return None
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing.queues import Queue
+from pathlib import Path
+from typing import Literal
+from app import metrics, transcription, transcription_client
+from app.classes import TranscriptSegment
+from app.config import TRANSCRIPTION_QUEUE_SIZE, TRANSCRIPTION_WORKERS
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+
+class QueueFullError(Exception):
+    """Raised when the transcription queue has no room for another job."""
+
+
+@dataclass
+class TranscriptionJob:
+    job_id: str
+    audio_path: Path
+    future: Future
+    submitted_at: float = field(default_factory=time.monotonic)
+    first_segment_at: float | None = None
+    segments: list[TranscriptSegment] = field(default_factory=list)
+
+    @property
+    def partial_transcript(self) -> str:
+        return transcription.join_segments(self.segments)
+
+    @property
+    def status(self) -> JobStatus:
+        if self.future.done():
+            if self.future.exception() is not None or self.future.result() is None:
+                return "failed"
+            return "done"
+        return "running" if self.future.running() else "queued"
+
+    @property
+    def result(self) -> list[TranscriptSegment] | transcription.LiveWindow | None:
+        if not self.future.done() or self.future.exception() is not None:
+            return None
+        return self.future.result()
+
+
+QUEUE_DEPTH = metrics.Histogram(
+    "artifactmaker_transcription_queue_depth",
+    "Jobs already pending when a transcription job is submitted.",
+    buckets=metrics.DEPTH_BUCKETS,
+)
+JOB_SECONDS = metrics.Histogram(
+    "artifactmaker_transcription_job_seconds",
+    "Time from submitting a transcription job to its result, queueing included.",
+)
+TIME_TO_FIRST_WORD = metrics.Histogram(
+    "artifactmaker_transcription_time_to_first_word_seconds",
+    "Time from submitting a transcription job to its first decoded segment.",
+)
+
+_executor: Executor | None = None
+_lock = threading.Lock()
+_jobs: dict[str, TranscriptionJob] = {}
+
+# Set in each worker process; carries (job_id, segment) back to the parent, and
+# (None, drained metrics) after each job when metrics are enabled.
+_segment_queue: Queue | None = None
+
+
+def _init_worker(segment_queue: Queue) -> None:
+    """Loads the Whisper models once per worker process and reports their cost."""
+    global _segment_queue
+    _segment_queue = segment_queue
+    if not transcription_client.ENABLED:
+        transcription.preload_models()
+        _send_metrics()
+
+
+def _noop() -> None:
+    pass
+
+
+def _send_metrics() -> None:
+    if metrics.ENABLED and multiprocessing.parent_process() is not None:
+        _segment_queue.put((None, metrics.drain()))
+
+
+def _run_job(job_id: str, audio_path: Path) -> list[TranscriptSegment] | None:
+    try:
+        return transcription.transcribe_audio_segments(
+            audio_path, on_segment=lambda segment: _segment_queue.put((job_id, segment))
+        )
+    finally:
+        _send_metrics()
+
+
+def _run_live_window(
+    job_id: str, audio_path: Path, offset_seconds: float, final: bool
+) -> transcription.LiveWindow | None:
+    try:
+        return transcription.transcribe_live_window(audio_path, offset_seconds, final)
+    finally:
+        _send_metrics()
+
+
+def _dispatch_segments(segment_queue: Queue) -> None:
+    """Appends segments streamed by the workers to their jobs as they arrive."""
+    while True:
+        job_id, segment = segment_queue.get()
+        if job_id is None:
+            metrics.merge(segment)
+            continue
+        with _lock:
+            job = _jobs.get(job_id)
+            if job is None:
+                continue
+            if job.first_segment_at is None:
+                job.first_segment_at = time.monotonic()
+                elapsed = job.first_segment_at - job.submitted_at
+                TIME_TO_FIRST_WORD.observe(elapsed)
+                logging.info(f"Job {job_id} time to first word: {elapsed:.2f}s")
+            job.segments.append(segment)
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        logging.info(f"Starting {TRANSCRIPTION_WORKERS} transcription worker(s)...")
+        context = multiprocessing.get_context("spawn")
+        segment_queue = context.Queue()
+        threading.Thread(
+            target=_dispatch_segments, args=(segment_queue,), daemon=True
+        ).start()
+        if transcription_client.ENABLED:
+            # Workers only wait on the transcription server, so threads will do,
+            # and no process here holds a model unless the server goes away.
+            _executor = ThreadPoolExecutor(
+                max_workers=TRANSCRIPTION_WORKERS,
+                thread_name_prefix="transcription",
+                initializer=_init_worker,
+                initargs=(segment_queue,),
+            )
+        else:
+            _executor = ProcessPoolExecutor(
+                max_workers=TRANSCRIPTION_WORKERS,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(segment_queue,),
+            )
+    return _executor
+
+
+def warm_up() -> None:
+    """Spawns every worker up front so their models load before the first recording."""
+    executor = _get_executor()
+    for _ in range(TRANSCRIPTION_WORKERS):
+        executor.submit(_noop)
+
+
+def pending_jobs() -> int:
+    """Returns the number of jobs that are queued or running."""
+    with _lock:
+        return sum(1 for job in _jobs.values() if not job.future.done())
+
+
+PENDING_JOBS = metrics.Gauge(
+    "artifactmaker_transcription_jobs_pending",
+    "Transcription jobs queued or running.",
+    pending_jobs,
+)
+
+
+def submit(audio_path: Path) -> str:
+    """Queues an audio file for transcription and returns its job ID."""
+    return _submit(audio_path, _run_job)
+
+
+def submit_live_window(
+    audio_path: Path, offset_seconds: float, final: bool = False
+) -> str:
+    """Queues transcription of a recording's audio after `offset_seconds`.
+
+    The job's result is what transcription.transcribe_live_window returns. Live
+    windows share the queue, and its limit, with whole recordings.
+    """
+    return _submit(audio_path, _run_live_window, offset_seconds, final)
+
+
+def _submit(audio_path: Path, run, *args) -> str:
+    with _lock:
+        pending = sum(1 for job in _jobs.values() if not job.future.done())
+        if pending >= TRANSCRIPTION_QUEUE_SIZE + TRANSCRIPTION_WORKERS:
+            raise QueueFullError(f"{pending} transcription jobs already pending")
+        QUEUE_DEPTH.observe(pending)
+        job_id = uuid.uuid4().hex
+        future = _get_executor().submit(run, job_id, audio_path, *args)
+        _jobs[job_id] = TranscriptionJob(job_id, audio_path, future)
+    if metrics.ENABLED:
+        submitted_at = time.monotonic()
+        future.add_done_callback(
+            lambda _: JOB_SECONDS.observe(time.monotonic() - submitted_at)
+        )
+    logging.info(f"Queued transcription job {job_id} for {audio_path}.")
+    return job_id
+
+
+def get_job(job_id: str) -> TranscriptionJob | None:
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def get_partial_transcript(job_id: str) -> str:
+    """Returns the text decoded so far for a running job."""
+    with _lock:
+        job = _jobs.get(job_id)
+        return job.partial_transcript if job else ""
+
+
+def queue_position(job_id: str) -> int:
+    """Returns how many queued jobs were submitted ahead of this one."""
+    with _lock:
+        ahead = 0
+        for other_id, job in _jobs.items():
+            if other_id == job_id:
+                return ahead
+            if job.status == "queued":
+                ahead += 1
+        return 0
+
+
+def forget(job_id: str) -> None:
+    """Drops a finished job from the registry once its result has been used."""
+    with _lock:
+        _jobs.pop(job_id, None)
+
+
+async def wait(
+    job_id: str,
+) -> list[TranscriptSegment] | transcription.LiveWindow | None:
+    """Waits for a job without blocking the event loop and returns its result."""
+    job = get_job(job_id)
+    if job is None:
+        return None
+    try:
+        return await asyncio.wrap_future(job.future)
+    except Exception as e:
+        logging.exception(f"Transcription job {job_id} failed: {e}")
+        return None
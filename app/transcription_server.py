@@ -0,0 +1,184 @@
+"""A local transcription daemon that owns the Whisper model for every backend worker.
+
+Start it next to the app, with the same ARTIFACTMAKER_TRANSCRIPTION_SOCKET:
+
+    ARTIFACTMAKER_TRANSCRIPTION_SOCKET=/run/artifactmaker/whisper.sock \\
+        python -m app.transcription_server
+
+Backends then send transcriptions here through app.transcription_client instead of
+loading their own copy of the model, so memory stays flat however many web
+workers run. Up to ARTIFACTMAKER_WHISPER_NUM_WORKERS requests decode at once on
+the one shared model; the rest wait their turn.
+
+With ARTIFACTMAKER_METRICS=1 set here too, each reply carries the decode timings
+and slot waits it recorded, and the backend adds them to its own /metrics.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from app import transcription, transcription_client
+from app.config import TRANSCRIPTION_SOCKET, WHISPER_NUM_WORKERS, WHISPER_PRELOAD
+from app.transcription_client import HEARTBEAT_SECONDS
+
+_DONE = object()
+_load = {"decoding": 0, "waiting": 0}
+
+
+async def _reply(writer: asyncio.StreamWriter, message: dict) -> None:
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+async def _run(
+    request: dict, writer: asyncio.StreamWriter, slots: asyncio.Semaphore
+) -> None:
+    """Runs one request on a thread, streaming segments and heartbeats back."""
+    loop = asyncio.get_running_loop()
+    messages: asyncio.Queue = asyncio.Queue()
+
+    def on_segment(segment):
+        loop.call_soon_threadsafe(messages.put_nowait, {"segment": segment})
+
+    path = Path(request["path"])
+    if request["op"] == "transcribe":
+        work = functools.partial(
+            transcription.decode_segments,
+            path,
+            on_segment,
+            request["profile"],
+            request["vad"],
+        )
+    else:
+        work = functools.partial(
+            transcription.decode_live_window,
+            path,
+            float(request["offset"]),
+            bool(request["final"]),
+        )
+
+    async def produce():
+        try:
+            transcription_client.SERVER_QUEUE_DEPTH.observe(_load["waiting"])
+            _load["waiting"] += 1
+            arrived = time.monotonic()
+            async with slots:
+                _load["waiting"] -= 1
+                transcription_client.SERVER_WAIT_SECONDS.observe(
+                    time.monotonic() - arrived
+                )
+                _load["decoding"] += 1
+                try:
+                    result = await asyncio.to_thread(work)
+                finally:
+                    _load["decoding"] -= 1
+            reply = {"result": result}
+        except Exception as e:
+            logging.exception(f"Transcription request for {path} failed: {e}")
+            reply = {"error": str(e)}
+        await messages.put({**reply, "metrics": transcription_client.dump_metrics()})
+        await messages.put(_DONE)
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(messages.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                message = {"heartbeat": True}
+            if message is _DONE:
+                break
+            await _reply(writer, message)
+    finally:
+        # A client that hangs up doesn't cancel the decode, which still holds
+        # its slot until Whisper finishes.
+        await asyncio.shield(task)
+
+
+def _handler(slots: asyncio.Semaphore):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = json.loads(await reader.readline())
+            if request.get("op") == "status":
+                await _reply(
+                    writer,
+                    {
+                        "result": {
+                            "models": transcription.get_model_stats(),
+                            "slots": WHISPER_NUM_WORKERS,
+                            **_load,
+                        }
+                    },
+                )
+            elif request.get("op") in ("transcribe", "live"):
+                await _run(request, writer, slots)
+            else:
+                await _reply(writer, {"error": f"Unknown op {request.get('op')}"})
+        except (ConnectionError, ValueError, KeyError) as e:
+            logging.warning(f"Dropped a transcription request: {e}")
+        finally:
+            writer.close()
+
+    return handle
+
+
+def _claim_socket(path: str) -> None:
+    """Removes a socket left behind by a daemon that died, but never a live one's."""
+    if not os.path.exists(path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise SystemExit(f"A transcription server is already listening on {path}.")
+
+
+def _preload() -> None:
+    for model_size in WHISPER_PRELOAD:
+        transcription.get_model(model_size)
+
+
+async def serve(path: str) -> None:
+    _claim_socket(path)
+    slots = asyncio.Semaphore(WHISPER_NUM_WORKERS)
+    server = await asyncio.start_unix_server(_handler(slots), path=path)
+    # Stop on SIGTERM the same way as on Ctrl-C, so the socket is cleaned up.
+    asyncio.get_running_loop().add_signal_handler(
+        signal.SIGTERM, asyncio.current_task().cancel
+    )
+    try:
+        os.chmod(path, 0o660)
+        logging.info(f"Transcription server listening on {path}; loading models...")
+        await asyncio.to_thread(_preload)
+        async with server:
+            await server.serve_forever()
+    finally:
+        os.unlink(path)
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO)
+    if not TRANSCRIPTION_SOCKET:
+        print("Set ARTIFACTMAKER_TRANSCRIPTION_SOCKET to the socket path to listen on.")
+        return 2
+    try:
+        asyncio.run(serve(TRANSCRIPTION_SOCKET))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, TypedDict
+from app import blobs
+from app.config import (
+    DATA_DIR,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_EXPIRY_SECONDS,
+    UPLOAD_MAX_BYTES,
+)
+
+# Partial uploads live on the data volume, so saving an entry is a rename rather
+# than a copy. The leading dot keeps them out of the index and the media endpoint.
+UPLOADS_DIR = DATA_DIR / ".uploads"
+UPLOAD_ROUTE = "/uploads"
+LIVE_AUDIO_ROUTE = "/live-audio"
+LIVE_AUDIO_FILENAME = "recording"
+DATA_FILENAME = "data"
+META_FILENAME = "meta.json"
+CHUNKS_DIRNAME = "chunks"
+COMPLETE_DIRNAME = "complete"
+
+_finish_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """Raised when an upload request can't be accepted; carries an HTTP status."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadStatus(TypedDict):
+    id: str
+    filename: str
+    size: int
+    chunk_size: int
+    received: list[int]
+    received_bytes: int
+    complete: bool
+
+
+def _upload_dir(upload_id: str) -> Path:
+    # IDs are generated as hex, so anything else can't name one of ours.
+    if not upload_id or not all(c in "0123456789abcdef" for c in upload_id):
+        raise UploadError("Unknown upload", 404)
+    return UPLOADS_DIR / upload_id
+
+
+def _read_meta(upload_id: str) -> dict:
+    try:
+        return json.loads((_upload_dir(upload_id) / META_FILENAME).read_text())
+    except FileNotFoundError:
+        raise UploadError("Unknown upload", 404) from None
+
+
+def _chunk_count(meta: dict) -> int:
+    return max(1, math.ceil(meta["size"] / meta["chunk_size"]))
+
+
+def _chunk_length(meta: dict, index: int) -> int:
+    return min(meta["chunk_size"], meta["size"] - index * meta["chunk_size"])
+
+
+def expire_stale() -> None:
+    """Deletes uploads that have seen no chunks for UPLOAD_EXPIRY_SECONDS.
+
+    Writing into a file doesn't change its directory's mtime, so every chunk and
+    timeslice touches the upload's directory to mark it as active.
+    """
+    if not UPLOADS_DIR.is_dir():
+        return
+    cutoff = time.time() - UPLOAD_EXPIRY_SECONDS
+    for upload_dir in UPLOADS_DIR.iterdir():
+        try:
+            if upload_dir.stat().st_mtime < cutoff:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+                logging.info(f"Expired stale upload {upload_dir.name}")
+        except FileNotFoundError:
+            continue
+
+
+def create_upload(filename: str, size: int) -> UploadStatus:
+    """Registers a new upload and preallocates its file."""
+    name = Path(filename).name
+    if not name or name.startswith("."):
+        raise UploadError("Invalid filename")
+    if not 0 < size <= UPLOAD_MAX_BYTES:
+        raise UploadError(f"Uploads must be between 1 byte and {UPLOAD_MAX_BYTES}", 413)
+    expire_stale()
+    upload_id = uuid.uuid4().hex
+    upload_dir = _upload_dir(upload_id)
+    (upload_dir / CHUNKS_DIRNAME).mkdir(parents=True)
+    with (upload_dir / DATA_FILENAME).open("wb") as f:
+        f.truncate(size)
+    meta = {"filename": name, "size": size, "chunk_size": UPLOAD_CHUNK_SIZE}
+    (upload_dir / META_FILENAME).write_text(json.dumps(meta))
+    logging.info(f"Created upload {upload_id} for {name} ({size} bytes)")
+    return get_status(upload_id)
+
+
+def get_status(upload_id: str) -> UploadStatus:
+    """Reports which chunks of an upload have arrived intact."""
+    meta = _read_meta(upload_id)
+    upload_dir = _upload_dir(upload_id)
+    received = sorted(
+        int(marker.name) for marker in (upload_dir / CHUNKS_DIRNAME).iterdir()
+    )
+    return {
+        "id": upload_id,
+        "filename": meta["filename"],
+        "size": meta["size"],
+        "chunk_size": meta["chunk_size"],
+        "received": received,
+        "received_bytes": sum(_chunk_length(meta, index) for index in received),
+        "complete": (upload_dir / COMPLETE_DIRNAME / meta["filename"]).exists(),
+    }
+
+
+def _parse_checksum(header: str | None) -> bytes | None:
+    """Parses a tus-style "sha256 <base64 digest>" checksum header."""
+    if not header:
+        return None
+    algorithm, _, encoded = header.partition(" ")
+    if algorithm.lower() != "sha256":
+        raise UploadError(f"Unsupported checksum algorithm {algorithm}")
+    try:
+        return base64.b64decode(encoded, validate=True)
+    except ValueError:
+        raise UploadError("Malformed checksum") from None
+
+
+async def receive_chunk(
+    upload_id: str, index: int, body: AsyncIterator[bytes], checksum: str | None
+) -> UploadStatus:
+    """Writes one chunk in place as it streams in, then verifies and records it.
+
+    Chunks may arrive in any order and in parallel, since each one only writes its
+    own byte range. A chunk whose length or SHA-256 doesn't match is discarded, so
+    the client can simply send it again.
+    """
+    meta = _read_meta(upload_id)
+    if not 0 <= index < _chunk_count(meta):
+        raise UploadError(f"Chunk {index} is out of range")
+    status = get_status(upload_id)
+    if status["complete"]:
+        return status
+    expected_digest = _parse_checksum(checksum)
+    expected_length = _chunk_length(meta, index)
+    offset = index * meta["chunk_size"]
+    upload_dir = _upload_dir(upload_id)
+    digest = hashlib.sha256()
+    written = 0
+    fd = os.open(upload_dir / DATA_FILENAME, os.O_WRONLY)
+    try:
+        async for piece in body:
+            if written + len(piece) > expected_length:
+                raise UploadError(f"Chunk {index} is longer than expected", 409)
+            await asyncio.to_thread(os.pwrite, fd, piece, offset + written)
+            digest.update(piece)
+            written += len(piece)
+    finally:
+        os.close(fd)
+    if written != expected_length:
+        raise UploadError(
+            f"Chunk {index} has {written} bytes, expected {expected_length}", 409
+        )
+    if expected_digest is not None and digest.digest() != expected_digest:
+        # tus uses 460 for checksum mismatches.
+        raise UploadError(f"Chunk {index} failed its checksum", 460)
+    (upload_dir / CHUNKS_DIRNAME / str(index)).touch()
+    os.utime(upload_dir)
+    status = get_status(upload_id)
+    if len(status["received"]) == _chunk_count(meta) and not status["complete"]:
+        await asyncio.to_thread(_finish, upload_id, meta)
+        status["complete"] = True
+    return status
+
+
+def _finish(upload_id: str, meta: dict) -> None:
+    """Hashes the assembled file for the blob store and moves it into place.
+
+    Chunks arrive out of order, so the whole-file digest can't be built as they
+    stream in; hashing once here, while the file is still in the page cache,
+    keeps the read off the save.
+    """
+    upload_dir = _upload_dir(upload_id)
+    with _finish_lock:
+        data_path = upload_dir / DATA_FILENAME
+        if data_path.exists():
+            meta = {**meta, "sha256": blobs.hash_file(data_path)}
+            meta_path = upload_dir / META_FILENAME
+            tmp_path = meta_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(meta))
+            tmp_path.replace(meta_path)
+            (upload_dir / COMPLETE_DIRNAME).mkdir(exist_ok=True)
+            data_path.rename(upload_dir / COMPLETE_DIRNAME / meta["filename"])
+            logging.info(f"Upload {upload_id} ({meta['filename']}) is complete")
+
+
+def completed_path(upload_id: str) -> Path | None:
+    """Returns the assembled file of a finished upload, or None."""
+    try:
+        meta = _read_meta(upload_id)
+    except UploadError:
+        return None
+    path = _upload_dir(upload_id) / COMPLETE_DIRNAME / meta["filename"]
+    return path if path.exists() else None
+
+
+def completed_digest(upload_id: str) -> str | None:
+    """Returns the SHA-256 recorded when an upload finished, or None."""
+    try:
+        return _read_meta(upload_id).get("sha256")
+    except UploadError:
+        return None
+
+
+def live_audio_path(recording_id: str) -> Path:
+    """Returns where a recording in progress collects its timeslices."""
+    return _upload_dir(recording_id) / LIVE_AUDIO_FILENAME
+
+
+def append_live_audio(recording_id: str, offset: int, data: bytes) -> int:
+    """Appends a recorder timeslice meant to start at `offset`; returns the new size.
+
+    The browser sends timeslices one at a time, so a retry of one that already
+    arrived is acknowledged without writing it twice, and a gap is refused.
+    """
+    path = live_audio_path(recording_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("ab") as f:
+        size = f.tell()
+        if offset + len(data) <= size:
+            return size
+        if offset != size:
+            raise UploadError(f"Expected audio at offset {size}, got {offset}", 409)
+        if size + len(data) > UPLOAD_MAX_BYTES:
+            raise UploadError(
+                f"Recordings are limited to {UPLOAD_MAX_BYTES} bytes", 413
+            )
+        f.write(data)
+    os.utime(path.parent)
+    return size + len(data)
+
+
+def discard(upload_id: str) -> None:
+    """Removes an upload and whatever is left of its data."""
+    try:
+        shutil.rmtree(_upload_dir(upload_id), ignore_errors=True)
+    except UploadError:
+        pass
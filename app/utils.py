@@ -1,39 +1,92 @@
-from pathlib import Path
 import logging
-from app.storage import DATA_DIR, load_entry
+from app import index
 
 
-def get_all_dates_for_class(class_slug: str) -> list[str]:
-    """Scans the data directory and returns all entry dates for a class."""
-    class_dir = DATA_DIR / class_slug
-    if not class_dir.is_dir():
+def get_all_dates_for_class(class_slug: str, newest_first: bool = False) -> list[str]:
+    """Returns all entry dates for a class from the entry index."""
+    try:
+        return index.get_dates(class_slug, newest_first=newest_first)
+    except Exception as e:
+        logging.exception(f"Error reading dates for class {class_slug}: {e}")
         return []
+
+
+def get_date_window(class_slug: str, offset: int, limit: int) -> list[str]:
+    """Returns up to `limit` entry dates for a class, newest first, from `offset`."""
     try:
-        return sorted([d.name for d in class_dir.iterdir() if d.is_dir()])
+        return index.get_dates(
+            class_slug, newest_first=True, offset=max(0, offset), limit=limit
+        )
     except Exception as e:
         logging.exception(f"Error reading dates for class {class_slug}: {e}")
         return []
 
 
-def get_entry_label(class_slug: str, date_str: str) -> str:
-    """Generates a descriptive label for an entry."""
-    entry_data = load_entry(class_slug, date_str)
-    if not entry_data:
-        return f"{date_str} | Entry not found"
-    parts = [date_str]
-    if entry_data.get("images"):
-        num_images = len(entry_data["images"])
+def count_dates_for_class(class_slug: str) -> int:
+    """Returns the number of entry dates for a class."""
+    try:
+        return index.count_dates(class_slug)
+    except Exception as e:
+        logging.exception(f"Error counting dates for class {class_slug}: {e}")
+        return 0
+
+
+def get_date_position(class_slug: str, date_str: str) -> int:
+    """Returns a date's position among a class's dates, newest first, or -1."""
+    try:
+        return index.date_position(class_slug, date_str)
+    except Exception as e:
+        logging.exception(f"Error locating {date_str} for class {class_slug}: {e}")
+        return -1
+
+
+def search_entries(query: str, limit: int = 20) -> list[index.SearchResult]:
+    """Full-text search over notes and transcripts across all classes."""
+    try:
+        return index.search(query, limit=limit)
+    except Exception as e:
+        logging.exception(f"Error searching entries for {query!r}: {e}")
+        return []
+
+
+def get_entry_summaries(
+    class_slug: str, offset: int, limit: int
+) -> list[index.EntrySummary]:
+    """Returns up to `limit` of a class's summaries from `offset`, newest first."""
+    try:
+        return index.get_summaries(class_slug, offset=max(0, offset), limit=limit)
+    except Exception as e:
+        logging.exception(f"Error reading entry summaries for class {class_slug}: {e}")
+        return []
+
+
+def describe_entry(summary: index.EntrySummary) -> str:
+    """Lists what an entry contains, e.g. "2 images | audio | notes"."""
+    parts = []
+    if summary["entry_count"] > 1:
+        parts.append(f"{summary['entry_count']} entries")
+    if summary["image_count"]:
+        num_images = summary["image_count"]
         parts.append(f"{num_images} image{('s' if num_images > 1 else '')}")
-    if entry_data.get("videos"):
-        num_videos = len(entry_data["videos"])
+    if summary["video_count"]:
+        num_videos = summary["video_count"]
         parts.append(f"{num_videos} video{('s' if num_videos > 1 else '')}")
-    if entry_data.get("audio_path"):
+    if summary["has_audio"]:
         parts.append("audio")
-    if entry_data.get("transcript"):
+    if summary["transcript_length"]:
         parts.append("transcript")
-    if entry_data.get("typed_text"):
+    if summary["notes_length"]:
         parts.append("notes")
-    if len(parts) > 1:
-        return " | ".join(parts)
+    return " | ".join(parts)
+
+
+def get_entry_label(class_slug: str, date_str: str) -> str:
+    """Generates a descriptive label for an entry from its indexed summary."""
+    summary = index.get_summary(class_slug, date_str)
+    if not summary:
+        return f"{date_str} | Entry not found"
+    description = describe_entry(summary)
+    if description:
+        return f"{date_str} | {description}"
     else:
-        return f"{date_str} | Empty Entry"
\ No newline at end of file
+        return f"{date_str} | Empty Entry"
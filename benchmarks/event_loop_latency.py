@@ -0,0 +1,116 @@
+"""Measures how much a large save delays concurrent gallery reads on the event loop.
+
+Run from the repository root:
+
+    python -m benchmarks.event_loop_latency --video-mb 512
+    python -m benchmarks.event_loop_latency --sync  # save inline, as handlers used to
+
+While one entry with large videos is saved, a ticker wakes every few milliseconds
+and a gallery reader keeps loading an existing date, the way concurrent event
+handlers would. The report shows the worst ticker overshoot (how long the loop was
+stalled) and the gallery read latencies. With the async storage API the stall
+should stay in the low milliseconds however large the save is.
+
+Each run happens in a scratch directory, so the real data/ is never touched.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+CHUNK = b"\0" * (1024 * 1024)
+TICK_SECONDS = 0.005
+
+
+def _make_file(path: Path, size_mb: int) -> None:
+    with path.open("wb") as f:
+        for i in range(size_mb):
+            # Distinct chunks so hashing and copying can't take shortcuts.
+            f.write(i.to_bytes(8, "little") + CHUNK[8:])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video-mb", type=int, default=256)
+    parser.add_argument("--videos", type=int, default=2)
+    parser.add_argument(
+        "--sync", action="store_true", help="call save_entry inline on the loop"
+    )
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="artifactmaker-bench-"))
+    os.chdir(workdir)
+    os.environ["ARTIFACTMAKER_INDEX_PATH"] = str(workdir / "index.sqlite3")
+    try:
+        asyncio.run(_run(args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+async def _ticker(stop: asyncio.Event, overshoots: list[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        overshoots.append(time.perf_counter() - started - TICK_SECONDS)
+
+
+async def _gallery_reader(stop: asyncio.Event, latencies: list[float]) -> None:
+    from app import async_storage, storage
+
+    while not stop.is_set():
+        started = time.perf_counter()
+        # The uncached path, as for a date nobody has opened yet.
+        await async_storage.read(storage.load_entries, "bench", "2025-01-01")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(TICK_SECONDS)
+
+
+async def _run(args: argparse.Namespace, workdir: Path) -> None:
+    from app import async_storage, storage
+
+    upload_dir = workdir / "uploads"
+    upload_dir.mkdir()
+    storage.save_entry("bench", "2025-01-01", [], [], None, "Existing entry", "")
+    videos = []
+    for i in range(args.videos):
+        video = upload_dir / f"clip{i}.mp4"
+        _make_file(video, args.video_mb)
+        videos.append(video)
+
+    stop = asyncio.Event()
+    overshoots: list[float] = []
+    latencies: list[float] = []
+    background = [
+        asyncio.create_task(_ticker(stop, overshoots)),
+        asyncio.create_task(_gallery_reader(stop, latencies)),
+    ]
+    await asyncio.sleep(0.1)
+    started = time.perf_counter()
+    if args.sync:
+        ok = storage.save_entry("bench", "2025-01-02", [], videos, None, "", "")
+    else:
+        ok = await async_storage.save_entry(
+            "bench", "2025-01-02", [], videos, None, "", ""
+        )
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.1)
+    stop.set()
+    await asyncio.gather(*background)
+
+    print(f"mode:               {'sync' if args.sync else 'async'}")
+    print(f"saved:              {ok}")
+    print(f"uploaded:           {args.videos} x {args.video_mb} MiB")
+    print(f"save wall time:     {elapsed:.2f}s")
+    print(f"max loop stall:     {max(overshoots) * 1000:.1f} ms")
+    print(f"gallery reads:      {len(latencies)}")
+    print(f"gallery read p50:   {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"gallery read max:   {max(latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
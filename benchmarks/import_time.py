@@ -0,0 +1,99 @@
+"""Checks how long `import app.app` takes and that it loads no ML libraries.
+
+Run from the repository root:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --gallery-only --budget-ms 1500
+
+Each run imports the app in a fresh interpreter under `python -X importtime` and
+the fastest run is reported, with the modules that cost the most. The exit status
+is non-zero when the import goes over --budget-ms or pulls in faster_whisper or
+its dependencies, which should only load once a transcription actually runs.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Loaded by faster_whisper; none of them is needed to start the app.
+ML_MODULES = ("faster_whisper", "ctranslate2", "tokenizers", "av", "onnxruntime")
+DEFAULT_BUDGET_MS = 2000
+
+
+def _parse(stderr: str) -> dict[str, float]:
+    """Maps each module imported by app.app to its cumulative import time in ms.
+
+    -X importtime prints a module after everything it imported, indented by
+    depth, so app.app's imports are the indented lines just before its own.
+    Interpreter startup (site, encodings) comes earlier and is left out.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.rstrip(), int(cumulative_us) / 1000))
+    cumulative = {}
+    for name, ms in reversed(rows):
+        if cumulative and not name.startswith("  "):
+            break
+        if cumulative or name.strip() == "app.app":
+            cumulative.setdefault(name.strip(), ms)
+    return cumulative
+
+
+def measure(gallery_only: bool = False, runs: int = 3) -> dict:
+    """Imports app.app in fresh interpreters and returns the fastest run's timings."""
+    env = {**os.environ, "ARTIFACTMAKER_GALLERY_ONLY": "1" if gallery_only else "0"}
+    best: dict[str, float] | None = None
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.app"],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"import app.app failed:\n{completed.stderr[-2000:]}")
+        modules = _parse(completed.stderr)
+        if best is None or modules["app.app"] < best["app.app"]:
+            best = modules
+    top_level = {
+        name: ms for name, ms in best.items() if "." not in name and name != "app"
+    }
+    return {
+        "total_ms": best["app.app"],
+        "ml_modules": sorted(name for name in ML_MODULES if name in best),
+        "slowest": dict(sorted(top_level.items(), key=lambda item: -item[1])[:10]),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gallery-only", action="store_true")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    result = measure(args.gallery_only, args.runs)
+    print(f"mode:         {'gallery-only' if args.gallery_only else 'full'}")
+    print(f"import time:  {result['total_ms']:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    print("slowest packages:")
+    for name, ms in result["slowest"].items():
+        print(f"  {name:<24} {ms:>8.0f} ms")
+    failed = False
+    if result["ml_modules"]:
+        print(f"FAIL: imported {', '.join(result['ml_modules'])} at startup")
+        failed = True
+    if result["total_ms"] > args.budget_ms:
+        print("FAIL: over the import-time budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
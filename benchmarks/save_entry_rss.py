@@ -0,0 +1,84 @@
+"""Measures peak RSS while saving an entry with large video uploads.
+
+Run from the repository root:
+
+    python -m benchmarks.save_entry_rss --video-mb 1024 --videos 2
+    python -m benchmarks.save_entry_rss --naive  # the old read-everything approach
+
+Each run happens in a scratch directory, so the real data/ is never touched.
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+CHUNK = b"\0" * (1024 * 1024)
+
+
+def _make_file(path: Path, size_mb: int) -> None:
+    with path.open("wb") as f:
+        for _ in range(size_mb):
+            f.write(CHUNK)
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video-mb", type=int, default=256)
+    parser.add_argument("--videos", type=int, default=2)
+    parser.add_argument(
+        "--naive", action="store_true", help="read each upload into memory first"
+    )
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="artifactmaker-bench-"))
+    os.chdir(workdir)
+    os.environ["ARTIFACTMAKER_INDEX_PATH"] = str(workdir / "index.sqlite3")
+    try:
+        _run(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run(args: argparse.Namespace, workdir: Path) -> None:
+    from app import storage
+
+    upload_dir = workdir / "uploads"
+    upload_dir.mkdir()
+    videos = []
+    for i in range(args.videos):
+        video = upload_dir / f"clip{i}.mp4"
+        _make_file(video, args.video_mb)
+        videos.append(video)
+
+    baseline_mb = _peak_rss_mb()
+    started = time.perf_counter()
+    if args.naive:
+        entry_dir = storage.get_entry_dir("bench", "2025-01-01", storage.new_entry_id())
+        video_dir = entry_dir / "videos"
+        video_dir.mkdir(parents=True)
+        for video in videos:
+            (video_dir / video.name).write_bytes(video.read_bytes())
+        ok = True
+    else:
+        ok = storage.save_entry("bench", "2025-01-01", [], videos, None, "", "")
+    elapsed = time.perf_counter() - started
+
+    print(f"mode:          {'naive' if args.naive else 'streaming'}")
+    print(f"saved:         {ok}")
+    print(f"uploaded:      {args.videos} x {args.video_mb} MiB")
+    print(f"wall time:     {elapsed:.2f}s")
+    print(
+        f"peak RSS:      {_peak_rss_mb():.0f} MiB (before save {baseline_mb:.0f} MiB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Runs the storage, gallery and transcription benchmarks and writes JSON results.
+
+Run from the repository root:
+
+    python -m benchmarks.suite run --out before.json
+    python -m benchmarks.suite run --out after.json --dates 500 --images 4
+    python -m benchmarks.suite compare before.json after.json
+
+`run` generates a synthetic dataset (see benchmarks.synthetic) in a scratch
+directory, so the real data/ is never touched, and times:
+
+- get_all_dates_for_class for every class
+- load_entry and get_entry_label for a random sample of dates
+- save_entry for a new entry of the configured size, in a fresh process, with
+  how far its RSS rises during a save (the app import is not counted)
+- `import app.app` in a fresh interpreter (see benchmarks.import_time)
+- the transcription real-time factor of every decoding profile on generated
+  audio (or on --audio recordings), unless --skip-transcription is given
+
+Timings are reported in milliseconds as min/median/p95/mean over the repeats.
+`compare` prints the change in each median and exits non-zero when one got slower
+by more than --threshold.
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable
+
+from benchmarks import import_time, synthetic
+
+RESULTS_VERSION = 1
+SAMPLE_DATES = 20
+RSS_SAMPLE_INTERVAL = 0.005
+
+
+def _stats(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "min_ms": ordered[0] * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+    }
+
+
+def _time(func: Callable, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _current_rss_mb() -> float | None:
+    """Returns the process's resident set size right now, where Linux reports it."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _max_rss_during(func: Callable) -> float | None:
+    """Runs `func` and returns how far RSS rose above where it started meanwhile."""
+    before = _current_rss_mb()
+    if before is None:
+        func()
+        return None
+    highest = before
+    done = threading.Event()
+
+    def sample() -> None:
+        nonlocal highest
+        while not done.wait(RSS_SAMPLE_INTERVAL):
+            highest = max(highest, _current_rss_mb() or 0.0)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        func()
+    finally:
+        done.set()
+        sampler.join()
+    return max(highest, _current_rss_mb() or 0.0) - before
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def bench_dates(class_slugs: list[str], repeat: int) -> dict:
+    from app import utils
+
+    samples = []
+    for class_slug in class_slugs:
+        samples += _time(lambda: utils.get_all_dates_for_class(class_slug), repeat)
+    return _stats(samples)
+
+
+def bench_entries(
+    class_slugs: list[str], date_strs: list[str], repeat: int, rng: random.Random
+) -> dict:
+    from app import index, storage, utils
+
+    sample = [
+        (rng.choice(class_slugs), rng.choice(date_strs)) for _ in range(SAMPLE_DATES)
+    ]
+    load_samples = []
+    label_samples = []
+    for class_slug, date_str in sample:
+        for entry_id in index.entry_ids_on_disk(class_slug, date_str):
+            load_samples += _time(
+                lambda: storage.load_entry(class_slug, date_str, entry_id), repeat
+            )
+        label_samples += _time(
+            lambda: utils.get_entry_label(class_slug, date_str), repeat
+        )
+    return {
+        "load_entry": _stats(load_samples),
+        "get_entry_label": _stats(label_samples),
+    }
+
+
+def _save_worker(spec: synthetic.DatasetSpec, repeat: int, results) -> None:
+    """Saves `repeat` entries in a fresh process and reports wall times and RSS."""
+    from app import storage
+
+    rng = random.Random(spec.seed + 1)
+    baseline_mb = _peak_rss_mb()
+    samples = []
+    deltas = []
+    with tempfile.TemporaryDirectory(prefix="artifactmaker-save-") as staging:
+        for _ in range(repeat):
+            images, videos, audio = synthetic.make_inputs(spec, Path(staging), rng)
+
+            def save() -> None:
+                if not storage.save_entry(
+                    "benchmark",
+                    "2030-01-01",
+                    images,
+                    videos,
+                    audio,
+                    "notes",
+                    "transcript",
+                ):
+                    raise RuntimeError("save_entry failed")
+
+            started = time.perf_counter()
+            delta = _max_rss_during(save)
+            samples.append(time.perf_counter() - started)
+            if delta is not None:
+                deltas.append(delta)
+    peak_mb = _peak_rss_mb()
+    # Importing the app sets most of the process's peak, so the saves are judged
+    # by how far RSS rises while they run. Without /proc, the rise in the peak is
+    # the closest stand-in, though it stays 0 for saves smaller than the import.
+    results.put(
+        {
+            **_stats(samples),
+            "rss_before_mb": baseline_mb,
+            "peak_rss_mb": peak_mb,
+            "save_rss_delta_mb": max(deltas) if deltas else peak_mb - baseline_mb,
+        }
+    )
+
+
+def bench_save(spec: synthetic.DatasetSpec, repeat: int) -> dict:
+    # A spawned process starts from a clean interpreter, so the RSS it reports
+    # belongs to the app and the saves rather than to the dataset generation.
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_save_worker, args=(spec, repeat, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        return {"error": f"save worker exited with {process.exitcode}"}
+    return results.get()
+
+
+def bench_transcription(
+    audio_paths: list[Path], workdir: Path, spec: synthetic.DatasetSpec
+) -> dict:
+    from app import transcription
+
+    if not audio_paths:
+        generated = workdir / "rtf.wav"
+        synthetic.make_audio(
+            generated, max(spec.audio_seconds, 30.0), random.Random(spec.seed)
+        )
+        audio_paths = [generated]
+    started = time.perf_counter()
+    if transcription.get_model() is None:
+        return {"error": "Whisper model could not be loaded"}
+    results: dict = {
+        "model": transcription.MODEL_SIZE,
+        "model_load_s": time.perf_counter() - started,
+    }
+    for profile in transcription.DECODING_PROFILES:
+        for vad in (False, True):
+            audio_seconds = wall_seconds = 0.0
+            for audio_path in audio_paths:
+                duration = (
+                    len(transcription.load_audio(audio_path))
+                    / transcription.SAMPLE_RATE
+                )
+                started = time.perf_counter()
+                transcription.transcribe_audio_segments(
+                    audio_path, profile=profile, vad=vad
+                )
+                wall_seconds += time.perf_counter() - started
+                audio_seconds += duration
+            results[f"{profile}{'_vad' if vad else ''}_rtf"] = (
+                wall_seconds / audio_seconds
+            )
+    return results
+
+
+def run(args: argparse.Namespace) -> dict:
+    spec = synthetic.spec_from_args(args)
+    audio_paths = [path.resolve() for path in args.audio]
+    workdir = Path(tempfile.mkdtemp(prefix="artifactmaker-bench-"))
+    os.chdir(workdir)
+    os.environ["ARTIFACTMAKER_INDEX_PATH"] = str(workdir / "index.sqlite3")
+    os.environ["ARTIFACTMAKER_TRANSCRIPT_CACHE_DIR"] = str(workdir / "transcripts")
+    try:
+        rng = random.Random(spec.seed)
+        started = time.perf_counter()
+        entries = synthetic.generate(spec)
+        results: dict = {
+            "generate": {"entries": entries, "wall_s": time.perf_counter() - started}
+        }
+        class_slugs = synthetic.class_slugs(spec.classes)
+        date_strs = synthetic.date_strings(spec.dates)
+        print(f"Generated {entries} entries; timing reads...", file=sys.stderr)
+        results["get_all_dates_for_class"] = bench_dates(class_slugs, args.repeat)
+        results.update(bench_entries(class_slugs, date_strs, args.repeat, rng))
+        print("Timing save_entry...", file=sys.stderr)
+        results["save_entry"] = bench_save(spec, args.save_repeat)
+        imported = import_time.measure()
+        results["import_app"] = {
+            "total_ms": imported["total_ms"],
+            "ml_modules": imported["ml_modules"],
+        }
+        if not args.skip_transcription:
+            print("Timing transcription...", file=sys.stderr)
+            results["transcription"] = bench_transcription(audio_paths, workdir, spec)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "spec": asdict(spec),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+
+def _medians(results: dict, prefix: str = "") -> dict[str, float]:
+    """Flattens results to {"name.metric": value} for the numbers worth comparing."""
+    flat = {}
+    for name, value in results.items():
+        key = f"{prefix}{name}"
+        if isinstance(value, dict):
+            flat.update(_medians(value, f"{key}."))
+        elif isinstance(value, (int, float)) and (
+            key.endswith(("median_ms", "total_ms", "_rtf", "rss_delta_mb"))
+        ):
+            flat[key] = float(value)
+    return flat
+
+
+def compare(baseline_path: Path, current_path: Path, threshold: float) -> int:
+    baseline = json.loads(baseline_path.read_text())
+    current = json.loads(current_path.read_text())
+    if baseline["meta"]["spec"] != current["meta"]["spec"]:
+        print("warning: the runs used different datasets", file=sys.stderr)
+    before = _medians(baseline["results"])
+    after = _medians(current["results"])
+    regressions = 0
+    print(f"{'metric':<42} {'before':>10} {'after':>10} {'change':>8}")
+    for key in sorted(before.keys() & after.keys()):
+        change = (after[key] - before[key]) / before[key] if before[key] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  slower"
+        print(
+            f"{key:<42} {before[key]:>10.2f} {after[key]:>10.2f} {change:>+7.1%}{flag}"
+        )
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    synthetic.add_arguments(run_parser)
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--save-repeat", type=int, default=3)
+    run_parser.add_argument(
+        "--audio", nargs="*", type=Path, default=[], help="recordings for the RTF"
+    )
+    run_parser.add_argument("--skip-transcription", action="store_true")
+    run_parser.add_argument(
+        "--out", type=Path, help="write results here instead of stdout"
+    )
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.1, help="allowed slowdown (0.1 = 10%%)"
+    )
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        return compare(args.baseline, args.current, args.threshold)
+    out_path = args.out.resolve() if args.out else None
+    output = json.dumps(run(args), indent=2)
+    if out_path:
+        out_path.write_text(output + "\n")
+        print(f"Wrote {out_path}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Generates a synthetic dataset of classes, dates and entries under data/.
+
+Run from the directory whose data/ should be filled (the benchmark suite uses a
+scratch directory):
+
+    python -m benchmarks.synthetic --classes 3 --dates 200
+    python -m benchmarks.synthetic --dates 50 --images 4 --image-px 2048 --video-kb 4096
+
+Entries go through storage.save_entry, so they get blobs, derivatives and index
+rows exactly as real ones do. Images are random-noise JPEGs, audio is a WAV of
+tones and videos are random bytes with an .mp4 name (enough for storage and the
+gallery, though ffmpeg can't transcode them). The generator is seeded, so the
+same arguments always produce the same dataset.
+"""
+
+import argparse
+import datetime
+import logging
+import math
+import random
+import struct
+import tempfile
+import wave
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+FIRST_DATE = datetime.date(2025, 1, 1)
+SAMPLE_RATE = 16000
+WORDS = (
+    "atom bond cell dose enzyme field gene heart ion joule kinetic lab mole "
+    "neuron orbital pH quantum reaction solution titration vector wave yield zinc"
+).split()
+
+
+@dataclass
+class DatasetSpec:
+    classes: int = 3
+    dates: int = 100
+    entries_per_date: int = 1
+    images: int = 2
+    image_px: int = 640
+    videos: int = 0
+    video_kb: int = 512
+    audio_seconds: float = 5.0
+    seed: int = 0
+
+
+def class_slugs(count: int) -> list[str]:
+    """The app's own classes first, then made-up ones if more are asked for."""
+    from app import classes
+
+    slugs = list(classes.CLASS_INFO)[:count]
+    slugs.extend(f"synthetic-{i}" for i in range(len(slugs), count))
+    return slugs
+
+
+def date_strings(count: int) -> list[str]:
+    return [(FIRST_DATE - datetime.timedelta(days=i)).isoformat() for i in range(count)]
+
+
+def make_image(path: Path, width: int, rng: random.Random) -> None:
+    from PIL import Image
+
+    height = width * 3 // 4
+    Image.frombytes("RGB", (width, height), rng.randbytes(width * height * 3)).save(
+        path, "JPEG", quality=85
+    )
+
+
+def make_video(path: Path, size_kb: int, rng: random.Random) -> None:
+    path.write_bytes(rng.randbytes(size_kb * 1024))
+
+
+def make_audio(path: Path, seconds: float, rng: random.Random) -> None:
+    """Writes 16 kHz mono tones that change pitch every half second."""
+    frames = bytearray()
+    frequency = 220.0
+    for i in range(int(seconds * SAMPLE_RATE)):
+        if i % (SAMPLE_RATE // 2) == 0:
+            frequency = rng.uniform(150, 600)
+        sample = 0.3 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE)
+        frames += struct.pack("<h", int(sample * 32767))
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(bytes(frames))
+
+
+def make_inputs(
+    spec: DatasetSpec, staging_dir: Path, rng: random.Random
+) -> tuple[list[Path], list[Path], Path | None]:
+    """Creates one entry's uploads in `staging_dir`; save_entry consumes them."""
+    images = []
+    for i in range(spec.images):
+        images.append(staging_dir / f"photo{i}.jpg")
+        make_image(images[-1], spec.image_px, rng)
+    videos = []
+    for i in range(spec.videos):
+        videos.append(staging_dir / f"clip{i}.mp4")
+        make_video(videos[-1], spec.video_kb, rng)
+    audio = None
+    if spec.audio_seconds > 0:
+        audio = staging_dir / "recording.wav"
+        make_audio(audio, spec.audio_seconds, rng)
+    return images, videos, audio
+
+
+def generate(spec: DatasetSpec) -> int:
+    """Saves the dataset described by `spec`; returns how many entries were saved."""
+    from app import storage
+
+    rng = random.Random(spec.seed)
+    saved = 0
+    with tempfile.TemporaryDirectory(prefix="artifactmaker-synthetic-") as staging:
+        for class_slug in class_slugs(spec.classes):
+            for date_str in date_strings(spec.dates):
+                for n in range(spec.entries_per_date):
+                    images, videos, audio = make_inputs(spec, Path(staging), rng)
+                    saved += storage.save_entry(
+                        class_slug,
+                        date_str,
+                        images,
+                        videos,
+                        audio,
+                        f"Synthetic notes {n} for {date_str}\n"
+                        + " ".join(rng.choices(WORDS, k=40)),
+                        " ".join(rng.choices(WORDS, k=120)),
+                    )
+    return saved
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = DatasetSpec()
+    for name, value in asdict(defaults).items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}", type=type(value), default=value
+        )
+
+
+def spec_from_args(args: argparse.Namespace) -> DatasetSpec:
+    return DatasetSpec(**{name: getattr(args, name) for name in asdict(DatasetSpec())})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    spec = spec_from_args(parser.parse_args())
+    logging.basicConfig(level=logging.WARNING)
+    print(f"Saved {generate(spec)} synthetic entries under data/.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Measures the transcription real-time factor of each decoding profile and VAD setting.
+
+Run from the repository root with one or more sample recordings:
+
+    python -m benchmarks.transcription_rtf recordings/*.wav
+    python -m benchmarks.transcription_rtf lesson.wav --profiles fast balanced
+
+The real-time factor (RTF) is processing time divided by audio duration, so lower
+is better and anything under 1.0 is faster than real time. The transcript cache
+points at a scratch directory, so every run decodes from scratch.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("audio", nargs="+", type=Path, help="sample recordings")
+    parser.add_argument(
+        "--profiles", nargs="+", help="decoding profiles to run (default: all)"
+    )
+    args = parser.parse_args()
+
+    cache_dir = Path(tempfile.mkdtemp(prefix="artifactmaker-rtf-"))
+    os.environ["ARTIFACTMAKER_TRANSCRIPT_CACHE_DIR"] = str(cache_dir)
+    try:
+        _run(args)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def _run(args: argparse.Namespace) -> None:
+    from app import transcription
+
+    profiles = args.profiles or list(transcription.DECODING_PROFILES)
+    started = time.perf_counter()
+    if transcription.get_model() is None:
+        raise SystemExit("Whisper model could not be loaded.")
+    print(f"model:   {transcription.MODEL_SIZE} ({time.perf_counter() - started:.1f}s)")
+    print()
+    print(
+        f"{'file':<28} {'profile':<10} {'vad':<4} {'audio':>8} {'wall':>8} {'RTF':>6}"
+    )
+    for audio_path in args.audio:
+        duration = len(transcription.load_audio(audio_path)) / transcription.SAMPLE_RATE
+        for profile in profiles:
+            for vad in (False, True):
+                started = time.perf_counter()
+                segments = transcription.transcribe_audio_segments(
+                    audio_path, profile=profile, vad=vad
+                )
+                elapsed = time.perf_counter() - started
+                status = "" if segments is not None else "  (failed)"
+                print(
+                    f"{audio_path.name[:28]:<28} {profile:<10} "
+                    f"{'on' if vad else 'off':<4} {duration:>7.1f}s {elapsed:>7.1f}s "
+                    f"{elapsed / duration:>6.2f}{status}"
+                )
+
+
+if __name__ == "__main__":
+    main()